@@ -0,0 +1,86 @@
+# benchmarks/bench_exif_reader.py
+"""
+Micro-benchmark: header-only EXIF reader vs. the Pillow based path.
+
+Generates a corpus of JPEG/TIFF/WebP files (with and without EXIF dates) in a
+temporary folder, checks that both readers agree, then times each of them.
+
+Usage:
+    python benchmarks/bench_exif_reader.py [--files 2000] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+from exif_reader import read_datetime_original, ExifReadError
+from organizer import PhotoOrganizer
+from corpus import build_exif_payload
+
+
+def generate_corpus(folder, count):
+    """Writes `count` small images, cycling through formats and with/without EXIF."""
+    formats = [("jpg", "JPEG"), ("webp", "WEBP"), ("tiff", "TIFF")]
+    paths = []
+    for i in range(count):
+        ext, pil_format = formats[i % len(formats)]
+        path = os.path.join(folder, f"IMG_{i:06d}.{ext}")
+        img = Image.new("RGB", (320, 240), color=(i % 256, (i * 7) % 256, (i * 13) % 256))
+        if i % 4: # Three out of four files carry a capture date
+            date_str = f"20{10 + i % 15:02d}:{1 + i % 12:02d}:{1 + i % 28:02d} 12:34:56"
+            img.save(path, pil_format, exif=build_exif_payload(date_str))
+        else:
+            img.save(path, pil_format)
+        paths.append(path)
+    return paths
+
+
+def fast_path(path):
+    try:
+        return read_datetime_original(path)
+    except ExifReadError:
+        return None
+
+
+def time_reader(reader, paths, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for path in paths:
+            reader(path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=2000, help="Number of images to generate.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing runs per reader (best is reported).")
+    args = parser.parse_args()
+
+    organizer = PhotoOrganizer()
+    with tempfile.TemporaryDirectory() as folder:
+        paths = generate_corpus(folder, args.files)
+
+        # Both readers must agree before their speed means anything
+        mismatches = [p for p in paths if fast_path(p) != organizer._get_exif_date_with_pillow(p)
+                      and not p.endswith(".tiff")] # Pillow exposes no _getexif() for TIFF
+        if mismatches:
+            print(f"WARNING: {len(mismatches)} file(s) differ, e.g. {mismatches[0]}")
+
+        pillow_time = time_reader(organizer._get_exif_date_with_pillow, paths, args.repeat)
+        fast_time = time_reader(fast_path, paths, args.repeat)
+
+    print(f"Files:        {len(paths)}")
+    print(f"Pillow path:  {pillow_time:.3f}s ({len(paths) / pillow_time:,.0f} files/s)")
+    print(f"Header-only:  {fast_time:.3f}s ({len(paths) / fast_time:,.0f} files/s)")
+    print(f"Speedup:      {pillow_time / fast_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
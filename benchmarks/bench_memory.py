@@ -0,0 +1,114 @@
+# benchmarks/bench_memory.py
+"""
+Memory check: peak RSS of organize_files() must stay flat as the source grows.
+
+For every size, a source of empty files (spread over folders of --per-folder files, names
+cycling through a few name mode prefixes) is organized in a fresh child process, which reports
+its peak RSS. Exits non-zero if the largest run's peak exceeds the smallest one's by more than
+--tolerance-mb, so it can be used as a regression check.
+
+Usage:
+    python benchmarks/bench_memory.py [--sizes 10k,100k,1m] [--mode name] [--workers 1]
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from corpus import parse_scale
+
+
+PREFIXES = ["IMG", "DSC", "Wedding", "Holiday", "Party", "Trip", "Family", "Work"]
+
+
+def generate_empty_files(folder, count, per_folder):
+    """Creates count empty .jpg files, per_folder of them in each subfolder."""
+    for i in range(count):
+        file_folder = os.path.join(folder, f"{i // per_folder:05d}")
+        if i % per_folder == 0:
+            os.makedirs(file_folder)
+        open(os.path.join(file_folder, f"{PREFIXES[i % len(PREFIXES)]}_{i:07d}.jpg"), "wb").close()
+
+
+def child_main(spec):
+    """Runs one organization and prints its outcome and peak RSS (in MB) as JSON."""
+    from organizer import PhotoOrganizer, SUPPORTED_EXTENSIONS
+    result = []
+    log_lines = [0]
+
+    def count_log(message):
+        log_lines[0] += 1 # Consume the log like a front end would, without keeping it
+
+    start = time.perf_counter()
+    PhotoOrganizer().organize_files(
+        spec["source"], spec["destination"], lambda value: None, count_log,
+        lambda processed, skipped: result.append((processed, skipped)),
+        False, spec["mode"], SUPPORTED_EXTENSIONS, workers=spec["workers"],
+        transfer_workers=spec["transfer_workers"], recursive=True,
+    )
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        "processed": result[0][0],
+        "skipped": result[0][1],
+        "seconds": time.perf_counter() - start,
+        "peak_rss_mb": peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10k,100k", help="Comma separated source sizes. Default: 10k,100k.")
+    parser.add_argument("--mode", choices=("name", "date"), default="name", help="Organization mode. Default: name.")
+    parser.add_argument("--workers", type=int, default=1, help="Workers passed to organize_files. Default: 1.")
+    parser.add_argument("--transfer-workers", type=int, default=None, help="Use the pipelined engine.")
+    parser.add_argument("--per-folder", type=int, default=5000, help="Files per source folder. Default: 5000.")
+    parser.add_argument("--tolerance-mb", type=float, default=16.0,
+                        help="Allowed growth of peak RSS from the smallest to the largest size. Default: 16.")
+    parser.add_argument("--tmpdir", help="Where to create the sources.")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child_main(json.loads(args.child))
+        return
+
+    peaks = []
+    for size in args.sizes.split(","):
+        count = parse_scale(size)
+        work_folder = tempfile.mkdtemp(prefix="photo_organizer_memory_", dir=args.tmpdir)
+        try:
+            source = os.path.join(work_folder, "source")
+            generate_empty_files(source, count, args.per_folder)
+            spec = {"source": source, "destination": os.path.join(work_folder, "destination"), "mode": args.mode,
+                    "workers": args.workers, "transfer_workers": args.transfer_workers}
+            completed = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", json.dumps(spec)],
+                                       capture_output=True, text=True, check=True, cwd=REPO_DIR)
+            outcome = json.loads(completed.stdout.strip().splitlines()[-1])
+        finally:
+            shutil.rmtree(work_folder, ignore_errors=True)
+
+        if outcome["processed"] != count:
+            print(f"FAIL: {size}: only {outcome['processed']} of {count} files were organized")
+            sys.exit(1)
+        peaks.append(outcome["peak_rss_mb"])
+        print(f"{size:>6}: {count:>9,} files in {outcome['seconds']:7.1f}s "
+              f"({count / outcome['seconds']:,.0f} files/s), peak RSS {outcome['peak_rss_mb']:6.1f} MB")
+
+    growth = max(peaks) - peaks[0]
+    if growth > args.tolerance_mb:
+        print(f"FAIL: peak RSS grew by {growth:.1f} MB (tolerance {args.tolerance_mb} MB)")
+        sys.exit(1)
+    print(f"OK: peak RSS grew by {growth:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# benchmarks/bench_name_classifier.py
+"""
+Micro-benchmark and equivalence check for the name mode classifier.
+
+Generates a fuzzed set of filenames (separators, trailing numbers, ' (N)' suffixes, dots,
+characters that folder names can't contain, unicode, empty parts), checks that the memoized
+name_classifier gives exactly the same folder for every one of them as the original
+per-file implementation, then times both.
+
+Usage:
+    python benchmarks/bench_name_classifier.py [--names 500000] [--seed 0] [--repeat 3]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from name_classifier import subfolder_for_name, classify_names
+
+
+def reference_subfolder_name(filename):
+    """The name mode logic of PhotoOrganizer._get_subfolder_name before it was memoized."""
+    base_name_without_ext = os.path.splitext(filename)[0]
+
+    initial_folder_candidate = ""
+    if '_' in base_name_without_ext:
+        initial_folder_candidate = base_name_without_ext.split('_')[0]
+    elif '-' in base_name_without_ext:
+        initial_folder_candidate = base_name_without_ext.split('-')[0]
+    else:
+        initial_folder_candidate = base_name_without_ext
+
+    subfolder_name = re.sub(r'\s*(\(\d+\)|\d+)$', '', initial_folder_candidate).strip()
+    if not subfolder_name:
+        subfolder_name = base_name_without_ext.strip()
+    subfolder_name = re.sub(r'[\\/:*?"<>|]', '', subfolder_name)
+    if not subfolder_name or subfolder_name.strip(". ") == "":
+        return None
+    return subfolder_name
+
+
+PREFIXES = ["IMG", "DSC", "Wedding", "Party (2)", "IMG 0001", "Été", "日本", "a.b", "..", " ", "", "123",
+            "(4)", "Trip 12", "x:y", "<>", "..hidden", "CON", "tab\t"]
+PIECES = ["_", "-", " ", ".", "(", ")", "(3)", "0", "42", "a", "Z", "é", "📷", ":", "*", "?", '"', "|", "\\", "\t"]
+EXTENSIONS = [".jpg", ".JPG", ".mp4", ".tar.gz", "", ".", ".jpeg "]
+
+
+def fuzz_names(count, seed):
+    rng = random.Random(seed)
+    names = []
+    for _ in range(count):
+        if rng.random() < 0.7: # Realistic: a repeated prefix and a counter
+            name = rng.choice(PREFIXES) + rng.choice("_- ") + f"{rng.randrange(100000):05d}"
+        else: # Arbitrary noise
+            name = "".join(rng.choice(PIECES) for _ in range(rng.randrange(1, 10)))
+        names.append(name + rng.choice(EXTENSIONS))
+    return names
+
+
+def best_time(function, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--names", type=int, default=500000, help="Number of fuzzed filenames.")
+    parser.add_argument("--seed", type=int, default=0, help="Fuzzing seed.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing runs per implementation (best is reported).")
+    args = parser.parse_args()
+
+    names = fuzz_names(args.names, args.seed)
+
+    mismatches = [name for name in names if subfolder_for_name(name) != reference_subfolder_name(name)]
+    batch_folders, distinct_folders = classify_names(names)
+    mismatches += [name for name, folder in zip(names, batch_folders) if folder != reference_subfolder_name(name)]
+    if mismatches:
+        print(f"MISMATCH: {len(mismatches)} name(s) differ, e.g. {mismatches[0]!r}: "
+              f"{subfolder_for_name(mismatches[0])!r} != {reference_subfolder_name(mismatches[0])!r}")
+        sys.exit(1)
+
+    reference_time = best_time(lambda: [reference_subfolder_name(name) for name in names], args.repeat)
+    batch_time = best_time(lambda: classify_names(names), args.repeat)
+
+    print(f"Names:           {len(names)} ({len(distinct_folders)} distinct folders), all equivalent")
+    print(f"Per-file regex:  {reference_time:.3f}s ({len(names) / reference_time:,.0f} names/s)")
+    print(f"Batch memoized:  {batch_time:.3f}s ({len(names) / batch_time:,.0f} names/s)")
+    print(f"Speedup:         {reference_time / batch_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+# benchmarks/bench_organizer.py
+"""
+End-to-end benchmark of the organizer hot paths on synthetic corpora.
+
+For every scale, organization mode (name/date) and operation (copy/move), a fresh corpus is
+generated (see corpus.py) and organized in a child process, so each run starts with a cold
+organizer and its peak RSS is its own. Two engines are measured:
+  - phases:          scan, classify, mkdir, transfer and close, timed one after the other
+                     with the organizer's own building blocks.
+  - organize_files:  the real organize_files() call, as the GUI/CLI run it.
+Reported per phase: seconds, files/s, MB/s, peak RSS and read/write syscalls (from /proc/self/io).
+With --strace, each child also runs under `strace -c` for full per-syscall counts
+(timings are then inflated, so only compare strace runs with strace runs).
+
+Results are printed as a table and can be saved as JSON, then compared between commits:
+    python benchmarks/bench_organizer.py --scale 1k --scale 10k --output before.json
+    git checkout my-branch
+    python benchmarks/bench_organizer.py --scale 1k --scale 10k --output after.json
+    python benchmarks/bench_organizer.py --compare before.json after.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource # Unix only
+except ImportError:
+    resource = None
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from corpus import generate_corpus, parse_scale
+
+
+RESULTS_FORMAT_VERSION = 1
+MODES = ("name", "date")
+OPERATIONS = ("copy", "move")
+ENGINES = ("phases", "organize_files")
+# Syscalls worth showing individually in strace results
+STRACE_HIGHLIGHTS = ("openat", "newfstatat", "statx", "getdents64", "read", "write", "mkdir",
+                     "rename", "copy_file_range", "ioctl", "link", "unlink", "fsync")
+
+
+# --- Measurements inside the child process -------------------------------------------------------
+
+def _read_proc_io():
+    """Read- and write-type syscalls made so far by this process (Linux only, else None)."""
+    try:
+        with open("/proc/self/io") as f:
+            fields = dict(line.split(":", 1) for line in f)
+        return int(fields["syscr"]) + int(fields["syscw"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _reset_peak_rss():
+    """Resets the kernel's peak RSS mark (VmHWM) so it can be measured per phase. Linux only."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb(per_phase):
+    """Peak RSS of this process in MB: since the last reset if per_phase, else since it started."""
+    if per_phase:
+        try:
+            with open("/proc/self/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1]) / 1024
+        except (OSError, ValueError):
+            pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024 # Bytes on macOS, KB elsewhere
+
+
+class PhaseTimer:
+    """Collects the metrics of consecutive phases of one run."""
+    def __init__(self):
+        self.phases = {}
+        self.per_phase_rss = _reset_peak_rss()
+
+    def measure(self, name, function):
+        """Runs function(), which returns (files, bytes), and records its metrics under name."""
+        if self.per_phase_rss:
+            _reset_peak_rss()
+        syscalls_before = _read_proc_io()
+        start = time.perf_counter()
+        files, num_bytes = function()
+        seconds = time.perf_counter() - start
+        syscalls_after = _read_proc_io()
+        self.phases[name] = {
+            "seconds": seconds,
+            "files": files,
+            "bytes": num_bytes,
+            "peak_rss_mb": _peak_rss_mb(self.per_phase_rss),
+            "io_syscalls": None if syscalls_before is None else syscalls_after - syscalls_before,
+        }
+
+
+def _ignore(*args):
+    pass
+
+
+def run_phases(organizer, source, destination, mode, use_copy, timer):
+    """Runs the organizer one phase at a time over the whole corpus."""
+    from organizer import SUPPORTED_EXTENSIONS
+    from scanner import FileScanner
+
+    organizer._open_run(destination, use_copy, False, False, mode == "date", True, _ignore)
+    entries, tasks, folders = [], [], set()
+
+    def scan():
+        scanner = FileScanner(source, extensions=SUPPORTED_EXTENSIONS, max_depth=None, exclude_dirs=[destination])
+        entries.extend(scanner)
+        return len(entries), 0
+
+    def classify():
+        for entry in entries:
+            subfolder_name, _ = organizer._classify_file(entry, mode)
+            if subfolder_name is not None:
+                tasks.append((entry, subfolder_name))
+                folders.add(subfolder_name)
+        return len(entries), 0
+
+    def mkdir():
+        for subfolder_name in folders:
+            os.makedirs(os.path.join(destination, subfolder_name), exist_ok=True)
+        return len(folders), 0
+
+    def transfer():
+        files, num_bytes = 0, 0
+        for entry, subfolder_name in tasks:
+            success, _, _, size = organizer._transfer_entry(
+                entry, os.path.join(destination, subfolder_name), subfolder_name, use_copy)
+            if success:
+                files += 1
+                num_bytes += size
+        return files, num_bytes
+
+    def close():
+        organizer._close_run(_ignore)
+        return 0, 0
+
+    for name, function in (("scan", scan), ("classify", classify), ("mkdir", mkdir),
+                           ("transfer", transfer), ("close", close)):
+        timer.measure(name, function)
+
+
+def run_organize_files(organizer, source, destination, mode, use_copy, timer, workers, corpus_bytes):
+    """Runs organize_files() as a single phase."""
+    from organizer import SUPPORTED_EXTENSIONS
+    result = []
+
+    def organize():
+        organizer.organize_files(source, destination, _ignore, _ignore, lambda processed, skipped: result.append(processed),
+                                 use_copy, mode, SUPPORTED_EXTENSIONS, workers=workers, recursive=True)
+        return result[0], corpus_bytes
+
+    timer.measure("total", organize)
+
+
+def child_main(spec):
+    """Entry point of a child process: runs one scenario and prints its metrics as JSON."""
+    import_start = time.perf_counter()
+    from organizer import PhotoOrganizer
+    import_seconds = time.perf_counter() - import_start
+
+    organizer = PhotoOrganizer()
+    timer = PhaseTimer()
+    use_copy = spec["operation"] == "copy"
+    if spec["engine"] == "phases":
+        run_phases(organizer, spec["source"], spec["destination"], spec["mode"], use_copy, timer)
+    else:
+        run_organize_files(organizer, spec["source"], spec["destination"], spec["mode"], use_copy, timer,
+                           spec["workers"], spec["corpus_bytes"])
+    print(json.dumps({"import_seconds": import_seconds, "phases": timer.phases,
+                      "peak_rss_mb": _peak_rss_mb(False)}))
+
+
+# --- Orchestration in the parent process ---------------------------------------------------------
+
+def parse_strace_summary(file_path):
+    """Returns {syscall: calls} from an `strace -c` summary, including a 'total' entry."""
+    counts = {}
+    calls_end = None
+    with open(file_path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if "calls" in line and "syscall" in line:
+                calls_end = line.index("calls") + len("calls") # Columns are right aligned under their header
+                continue
+            if calls_end is None or not line.strip() or line.lstrip().startswith("-"):
+                continue
+            name = line.split()[-1]
+            try:
+                counts[name] = int(line[:calls_end].split()[-1])
+            except (ValueError, IndexError):
+                continue
+    return counts
+
+
+def run_scenario(spec, use_strace):
+    """Runs one scenario in a child process and returns its parsed metrics."""
+    command = [sys.executable, os.path.abspath(__file__), "--child", json.dumps(spec)]
+    strace_output = None
+    if use_strace:
+        strace_output = spec["destination"] + ".strace"
+        command = ["strace", "-f", "-c", "-o", strace_output] + command
+
+    completed = subprocess.run(command, capture_output=True, text=True, cwd=REPO_DIR)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Scenario {spec} failed:\n{completed.stderr}")
+    metrics = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    if strace_output is not None:
+        counts = parse_strace_summary(strace_output)
+        metrics["strace"] = {"total": counts.get("total"),
+                             **{name: counts[name] for name in STRACE_HIGHLIGHTS if name in counts}}
+    return metrics
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True,
+                              text=True, cwd=REPO_DIR, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(args):
+    results = []
+    work_root = tempfile.mkdtemp(prefix="photo_organizer_bench_", dir=args.tmpdir)
+    try:
+        for scale in args.scale:
+            count = parse_scale(scale)
+            for engine in args.engine:
+                for mode in args.mode:
+                    for operation in args.operation:
+                        run_folder = os.path.join(work_root, f"{scale}_{engine}_{mode}_{operation}")
+                        source = os.path.join(run_folder, "source")
+                        generation_start = time.perf_counter()
+                        files, corpus_bytes = generate_corpus(source, count, seed=args.seed,
+                                                              jpeg_kb=args.jpeg_kb, video_mb=args.video_mb)
+                        print(f"[{scale} {engine} {mode} {operation}] corpus: {files} files, "
+                              f"{corpus_bytes / 1e6:,.0f} MB in {time.perf_counter() - generation_start:.1f}s", file=sys.stderr)
+
+                        spec = {"engine": engine, "mode": mode, "operation": operation, "source": source,
+                                "destination": os.path.join(run_folder, "destination"),
+                                "workers": args.workers, "corpus_bytes": corpus_bytes}
+                        metrics = run_scenario(spec, args.strace)
+                        results.append({"scale": scale, "files": files, "corpus_bytes": corpus_bytes,
+                                        "engine": engine, "mode": mode, "operation": operation, **metrics})
+                        shutil.rmtree(run_folder, ignore_errors=True)
+    finally:
+        shutil.rmtree(work_root, ignore_errors=True)
+
+    return {
+        "version": RESULTS_FORMAT_VERSION,
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "jpeg_kb": args.jpeg_kb,
+            "video_mb": args.video_mb,
+            "workers": args.workers,
+            "strace": args.strace,
+        },
+        "results": results,
+    }
+
+
+# --- Reporting -----------------------------------------------------------------------------------
+
+def _rate(amount, seconds):
+    return amount / seconds if seconds > 0 else 0.0
+
+
+def _format_optional(value, spec):
+    return "-" if value is None else format(value, spec)
+
+
+def print_table(report):
+    meta = report["meta"]
+    print(f"Revision {meta['revision']}, Python {meta['python']}, {meta['platform']}, workers={meta['workers']}")
+    print(f"{'scale':>6} {'engine':<15}{'mode':<5}{'op':<5}{'phase':<9}{'seconds':>9}{'files/s':>11}"
+          f"{'MB/s':>9}{'RSS MB':>8}{'io sys':>9}")
+    for result in report["results"]:
+        for phase, m in result["phases"].items():
+            print(f"{result['scale']:>6} {result['engine']:<15}{result['mode']:<5}{result['operation']:<5}{phase:<9}"
+                  f"{m['seconds']:>9.3f}{_rate(m['files'], m['seconds']):>11,.0f}"
+                  f"{_rate(m['bytes'], m['seconds']) / 1e6:>9,.1f}{_format_optional(m['peak_rss_mb'], '.1f'):>8}"
+                  f"{_format_optional(m['io_syscalls'], ','):>9}")
+        if "strace" in result:
+            print(f"{'':>6} syscalls: " + ", ".join(f"{name} {calls:,}" for name, calls in result["strace"].items()
+                                                   if calls is not None))
+
+
+def _index(report):
+    indexed = {}
+    for result in report["results"]:
+        for phase, metrics in result["phases"].items():
+            indexed[(result["scale"], result["engine"], result["mode"], result["operation"], phase)] = metrics
+    return indexed
+
+
+def print_comparison(before, after):
+    """Prints the relative change of every phase present in both reports (negative is faster)."""
+    if before["meta"].get("strace") != after["meta"].get("strace"):
+        print("WARNING: only one of the reports was recorded under strace, timings are not comparable")
+    print(f"Before: {before['meta']['revision']}  After: {after['meta']['revision']}")
+    print(f"{'scale':>6} {'engine':<15}{'mode':<5}{'op':<5}{'phase':<9}{'before s':>10}{'after s':>10}"
+          f"{'change':>9}{'RSS before':>11}{'RSS after':>10}")
+    old_index, new_index = _index(before), _index(after)
+    for key, new in new_index.items():
+        old = old_index.get(key)
+        if old is None:
+            continue
+        change = (new["seconds"] - old["seconds"]) / old["seconds"] * 100 if old["seconds"] > 0 else 0.0
+        scale, engine, mode, operation, phase = key
+        print(f"{scale:>6} {engine:<15}{mode:<5}{operation:<5}{phase:<9}{old['seconds']:>10.3f}{new['seconds']:>10.3f}"
+              f"{change:>+8.1f}%{_format_optional(old['peak_rss_mb'], '.1f'):>11}"
+              f"{_format_optional(new['peak_rss_mb'], '.1f'):>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", action="append", help="Corpus size, e.g. 1k, 10k, 100k (repeatable). Default: 1k.")
+    parser.add_argument("--mode", action="append", choices=MODES, help="Organization mode(s). Default: both.")
+    parser.add_argument("--operation", action="append", choices=OPERATIONS, help="copy and/or move. Default: both.")
+    parser.add_argument("--engine", action="append", choices=ENGINES, help="Engine(s) to measure. Default: both.")
+    parser.add_argument("--workers", type=int, default=1, help="Workers passed to organize_files. Default: 1.")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus seed. Default: 0.")
+    parser.add_argument("--jpeg-kb", type=int, default=8, help="Average JPEG size in KB. Default: 8.")
+    parser.add_argument("--video-mb", type=int, default=8, help="Size of each dummy video in MB. Default: 8.")
+    parser.add_argument("--tmpdir", help="Where to generate corpora (pick the drive you want to measure).")
+    parser.add_argument("--strace", action="store_true", help="Also count every syscall with strace -c (Linux).")
+    parser.add_argument("--output", help="Save the results as JSON.")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two saved results and exit.")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child_main(json.loads(args.child))
+        return
+    if args.compare:
+        with open(args.compare[0], encoding="utf-8") as f_before, open(args.compare[1], encoding="utf-8") as f_after:
+            print_comparison(json.load(f_before), json.load(f_after))
+        return
+    if args.strace and shutil.which("strace") is None:
+        parser.error("--strace needs the strace tool on the PATH")
+
+    args.scale = args.scale or ["1k"]
+    args.mode = args.mode or list(MODES)
+    args.operation = args.operation or list(OPERATIONS)
+    args.engine = args.engine or list(ENGINES)
+
+    report = run_benchmarks(args)
+    print_table(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# benchmarks/bench_watch.py
+"""
+Watch mode check: drop-to-organized latency and CPU use while idle.
+
+Runs PhotoOrganizer.watch() on a temporary hot folder. Files are written into it one at a time
+(each in a few chunks, like an upload), and the time from a file's last write to its appearance
+in the destination is measured. Then the watcher is left idle and the process CPU time it uses
+is measured. Run once with and once without --no-inotify to compare both backends.
+Expected latency is about settle + (poll interval with --no-inotify); idle CPU should stay near zero.
+
+Usage:
+    python benchmarks/bench_watch.py [--files 20] [--settle 0.5] [--poll-interval 1] [--idle 10] [--no-inotify]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from organizer import PhotoOrganizer, SUPPORTED_EXTENSIONS
+
+
+def drop_file(path, size, chunks=4):
+    """Writes a file in a few chunks with short pauses, like an upload in progress."""
+    block = os.urandom(size // chunks)
+    with open(path, "wb") as f:
+        for _ in range(chunks):
+            f.write(block)
+            f.flush()
+            time.sleep(0.05)
+
+
+def wait_for(path, timeout):
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path):
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=20, help="Files dropped into the hot folder.")
+    parser.add_argument("--size-kb", type=int, default=256, help="Size of each file in KB.")
+    parser.add_argument("--settle", type=float, default=0.5, help="Settle time passed to watch().")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Poll interval passed to watch().")
+    parser.add_argument("--idle", type=float, default=10.0, help="Seconds to measure idle CPU for.")
+    parser.add_argument("--no-inotify", action="store_true", help="Use the polling backend.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_folder:
+        source = os.path.join(work_folder, "source")
+        destination = os.path.join(work_folder, "destination")
+        os.makedirs(source)
+        stop_event = threading.Event()
+        log = []
+        watcher_thread = threading.Thread(target=PhotoOrganizer().watch, args=(
+            source, destination, log.append, lambda processed, skipped: None, lambda processed, skipped: None,
+            False, "name", SUPPORTED_EXTENSIONS, stop_event,
+        ), kwargs={"settle_seconds": args.settle, "poll_interval": args.poll_interval,
+                   "use_inotify": not args.no_inotify, "use_journal": False})
+        watcher_thread.start()
+        time.sleep(0.2) # Let the watcher start before the first drop
+
+        latencies = []
+        for i in range(args.files):
+            name = f"Upload_{i:04d}.jpg"
+            drop_file(os.path.join(source, name), args.size_kb * 1024)
+            dropped = time.monotonic()
+            if not wait_for(os.path.join(destination, "Upload", name), args.settle + args.poll_interval + 10):
+                print(f"FAIL: {name} was not organized")
+                stop_event.set()
+                sys.exit(1)
+            latencies.append(time.monotonic() - dropped)
+
+        cpu_start, wall_start = time.process_time(), time.monotonic()
+        time.sleep(args.idle)
+        idle_cpu = time.process_time() - cpu_start
+        idle_wall = time.monotonic() - wall_start
+
+        stop_event.set()
+        watcher_thread.join()
+
+    backend = next((line.strip() for line in log if line.startswith("Watching")), "?")
+    print(f"{backend}")
+    print(f"Latency:   median {statistics.median(latencies) * 1000:.0f} ms, max {max(latencies) * 1000:.0f} ms "
+          f"over {len(latencies)} files (settle {args.settle:g}s)")
+    print(f"Idle CPU:  {idle_cpu * 1000:.1f} ms over {idle_wall:.1f}s ({idle_cpu / idle_wall * 100:.3f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# benchmarks/corpus.py
+"""
+Synthetic photo/video corpora for the benchmarks.
+
+Everything is generated from a seed with the standard library only (no Pillow needed),
+so the same scale and seed always produce the same tree on every machine and commit.
+"""
+import os
+import random
+import struct
+
+
+# Prefixes used by name mode ("Wedding_0001.jpg" -> "Wedding/")
+EVENT_NAMES = [
+    "Wedding", "Birthday", "Holiday", "Beach", "Hiking", "Christmas", "Concert", "Graduation", "Garden", "Zoo",
+    "Paris", "Tokyo", "Berlin", "Lisbon", "Roadtrip", "Camping", "Skiing", "Party", "Family", "Work",
+]
+
+# Names that exercise the edge cases of name mode and of the file system layer
+PATHOLOGICAL_NAMES = [
+    "IMG 0001 (3)", "no-separator", "___", "trailing_ ", ".hidden_file", "Été_à_la_plage", "日本語_写真",
+    "emoji_📷", "a" * 180 + "_long", "colon:star*quote\"_x", "Mixed-Separators_and-dashes", "12345",
+    "dots.in.the.name_1", "  spaces  _around",
+]
+
+CAMERA_FOLDERS = ["DCIM/100CANON", "DCIM/101CANON", "DCIM/102APPLE", "Phone/Camera", "Phone/WhatsApp/Media",
+                  "Imports/2019/Summer", "Imports/2021/Winter/Raw", "Scans"]
+
+FILES_PER_FOLDER = 250
+
+
+def build_exif_payload(date_str):
+    """
+    Builds a minimal little-endian EXIF block: IFD0 with an EXIF IFD pointer,
+    and an EXIF IFD holding only DateTimeOriginal.
+    """
+    date_bytes = date_str.encode("ascii") + b"\x00"
+    ifd0_offset = 8
+    exif_ifd_offset = ifd0_offset + 2 + 12 + 4
+    date_offset = exif_ifd_offset + 2 + 12 + 4
+
+    tiff = b"II" + struct.pack("<HI", 42, ifd0_offset)
+    tiff += struct.pack("<H", 1) + struct.pack("<HHII", 0x8769, 4, 1, exif_ifd_offset) + struct.pack("<I", 0)
+    tiff += struct.pack("<H", 1) + struct.pack("<HHII", 0x9003, 2, len(date_bytes), date_offset) + struct.pack("<I", 0)
+    tiff += date_bytes
+    return b"Exif\x00\x00" + tiff
+
+
+def jpeg_bytes(date_str, scan_size):
+    """
+    A structurally valid JPEG stream: JFIF header, optional EXIF APP1 with DateTimeOriginal,
+    then a start-of-scan followed by scan_size bytes of (fake) entropy-coded data.
+    """
+    data = b"\xff\xd8" # SOI
+    jfif = b"JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00"
+    data += b"\xff\xe0" + struct.pack(">H", len(jfif) + 2) + jfif
+    if date_str:
+        exif = build_exif_payload(date_str)
+        data += b"\xff\xe1" + struct.pack(">H", len(exif) + 2) + exif
+    sos = b"\x01\x01\x00\x00\x3f\x00"
+    data += b"\xff\xda" + struct.pack(">H", len(sos) + 2) + sos
+    data += b"\x5a" * scan_size # No 0xFF bytes, so no marker can appear inside the scan
+    return data + b"\xff\xd9" # EOI
+
+
+def _box(box_type, payload):
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def mp4_bytes(unix_time, media_size):
+    """
+    An MP4 laid out like camera files: ftyp, then a media_size byte mdat, then moov/mvhd (version 0)
+    carrying unix_time as its creation time. Readers have to seek over mdat to find the date.
+    """
+    mp4_time = unix_time + 2082844800 # Seconds between 1904-01-01 and 1970-01-01
+    mvhd = struct.pack(">B3xIIII", 0, mp4_time, mp4_time, 1000, 0) + b"\x00" * 80
+    return (_box(b"ftyp", b"isom\x00\x00\x02\x00isomiso2mp41")
+            + struct.pack(">I4s", 8 + media_size, b"mdat") + b"\x11" * media_size
+            + _box(b"moov", _box(b"mvhd", mvhd)))
+
+
+def _ebml_element(element_id, payload):
+    return element_id + b"\x01" + struct.pack(">Q", len(payload))[1:] + payload # 8-byte size vint
+
+
+def mkv_bytes(unix_time, media_size):
+    """A Matroska file with SeekHead, Info/DateUTC and one media_size byte Cluster."""
+    nanoseconds = (unix_time - 978307200) * 1000000000 # 2001-01-01 is the Matroska epoch
+    header = _ebml_element(b"\x1a\x45\xdf\xa3", _ebml_element(b"\x42\x82", b"matroska"))
+    info = _ebml_element(b"\x15\x49\xa9\x66", _ebml_element(b"\x2a\xd7\xb1", b"\x0f\x42\x40")
+                         + _ebml_element(b"\x44\x61", struct.pack(">q", nanoseconds)))
+    segment = (_ebml_element(b"\x11\x4d\x9b\x74", b"\x00" * 32) + info
+               + _ebml_element(b"\x1f\x43\xb6\x75", b"\x11" * media_size))
+    return header + _ebml_element(b"\x18\x53\x80\x67", segment)
+
+
+def parse_scale(value):
+    """'1k' -> 1000, '100k' -> 100000, '2m' -> 2000000, '500' -> 500."""
+    value = value.strip().lower()
+    multiplier = {"k": 1000, "m": 1000000}.get(value[-1:], 1)
+    return int(float(value.rstrip("km")) * multiplier)
+
+
+def generate_corpus(folder, count, seed=0, jpeg_kb=8, video_mb=8):
+    """
+    Writes `count` files into a nested tree under `folder` and returns (files, bytes) written.
+    The mix is roughly: 60% JPEG with an EXIF date, 20% JPEG without one, 6% PNG, 4% text,
+    10% pathological names, plus one large video (.mp4/.mov/.mkv, with a recording date in its
+    container header) per 500 files.
+    Modification times are spread over ten years so date mode's mtime fallback fans out too.
+    """
+    rng = random.Random(seed)
+    video_every = 500
+    created_folders = set()
+    total_bytes = 0
+
+    for i in range(count):
+        subfolder = CAMERA_FOLDERS[(i // FILES_PER_FOLDER) % len(CAMERA_FOLDERS)]
+        subfolder = os.path.join(subfolder, f"batch{i // (FILES_PER_FOLDER * len(CAMERA_FOLDERS)):03d}")
+        file_folder = os.path.join(folder, subfolder)
+        if file_folder not in created_folders:
+            os.makedirs(file_folder, exist_ok=True)
+            created_folders.add(file_folder)
+
+        year = 2015 + rng.randrange(10)
+        month = 1 + rng.randrange(12)
+        date_str = f"{year}:{month:02d}:{1 + rng.randrange(28):02d} {rng.randrange(24):02d}:{rng.randrange(60):02d}:00"
+        event = EVENT_NAMES[rng.randrange(len(EVENT_NAMES))]
+        scan_size = rng.randint(jpeg_kb * 512, jpeg_kb * 1536)
+
+        roll = rng.random()
+        if i % video_every == video_every - 1:
+            ext = rng.choice([".mp4", ".mov", ".mkv"])
+            video_bytes = mkv_bytes if ext == ".mkv" else mp4_bytes
+            name, data = f"{event}_clip{i:06d}{ext}", video_bytes(int(rng.uniform(1420070400, 1735689600)),
+                                                                  video_mb * 1024 * 1024)
+        elif roll < 0.60:
+            name, data = f"{event}_{i:06d}.jpg", jpeg_bytes(date_str, scan_size)
+        elif roll < 0.80:
+            name, data = f"{event}-{i:06d}.jpeg", jpeg_bytes(None, scan_size)
+        elif roll < 0.86:
+            name, data = f"{event}_{i:06d}.png", b"\x89PNG\r\n\x1a\n" + b"\x00" * 512
+        elif roll < 0.90:
+            name, data = f"Notes_{i:06d}.txt", b"note\n" * 20
+        else:
+            stem = PATHOLOGICAL_NAMES[rng.randrange(len(PATHOLOGICAL_NAMES))]
+            name, data = f"{stem}{i:06d}.JPG", jpeg_bytes(date_str if rng.random() < 0.5 else None, scan_size)
+
+        file_path = os.path.join(file_folder, name)
+        with open(file_path, "wb") as f:
+            f.write(data)
+        mtime = rng.uniform(1420070400, 1735689600) # 2015-01-01 .. 2025-01-01
+        os.utime(file_path, (mtime, mtime))
+        total_bytes += len(data)
+
+    return count, total_bytes
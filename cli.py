@@ -0,0 +1,234 @@
+# cli.py
+"""
+Headless command line interface for the Photo Organizer.
+
+Drives PhotoOrganizer directly (no GUI modules are imported) and writes one JSON object
+per line to stdout, so schedulers and scripts can follow progress and read the results.
+
+Examples:
+    python cli.py /media/card/DCIM /srv/photos --mode date --recursive --workers 8
+    python cli.py ./incoming ./sorted --copy --ext jpg,mp4 --dry-run
+    python cli.py ./sorted --resume
+    python cli.py /srv/uploads /srv/photos --mode date --watch
+
+Errors that affect a whole run (unreadable source folder, unexpected failure) are emitted as "error" events,
+even with --quiet, and make the exit status 1.
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+
+from organizer import PhotoOrganizer, SUPPORTED_EXTENSIONS, WATCH_BATCH_SIZE
+from metrics import RunMetrics, PROFILERS
+from watcher import DEFAULT_SETTLE_SECONDS, DEFAULT_POLL_INTERVAL
+from transfer import VERIFY_SIZE, VERIFY_CHECKSUM, VERIFY_READBACK
+
+
+class JsonLinesReporter:
+    """Turns the organizer callbacks into JSON-lines events on a stream."""
+    def __init__(self, stream=None, quiet=False):
+        self.stream = stream or sys.stdout
+        self.quiet = quiet
+        self.result = None
+        self._last_percent = -1
+
+    def emit(self, event, **fields):
+        fields["event"] = event
+        self.stream.write(json.dumps(fields, ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+    def log(self, message):
+        if not self.quiet:
+            self.emit("log", message=message.strip())
+
+    def progress(self, value):
+        percent = int(value)
+        if percent != self._last_percent: # At most one progress event per whole percent
+            self._last_percent = percent
+            self.emit("progress", percent=percent)
+
+    def done(self, processed, skipped):
+        self.result = (processed, skipped)
+        self.emit("done", processed=processed, skipped=skipped)
+
+    def batch(self, processed, skipped):
+        self.emit("batch", processed=processed, skipped=skipped)
+
+    def trace(self, phase, path, seconds):
+        self.emit("trace", phase=phase, path=path, ms=round(seconds * 1000, 3))
+
+
+def parse_extensions(values):
+    """Accepts 'jpg,png' or repeated --ext options, with or without leading dots."""
+    if not values:
+        return set(SUPPORTED_EXTENSIONS)
+    extensions = set()
+    for value in values:
+        for ext in value.split(","):
+            ext = ext.strip().lower()
+            if ext:
+                extensions.add(ext if ext.startswith(".") else "." + ext)
+    return extensions
+
+
+def emit_metrics(reporter, metrics):
+    """Ends a run with its metrics summary (and profile, if one was recorded)."""
+    reporter.emit("summary", text=metrics.summary(), **metrics.stats())
+    if metrics.profile_report:
+        reporter.emit("profile", profiler=metrics.profile, text=metrics.profile_report)
+
+
+def same_folder(a, b):
+    return os.path.normcase(os.path.abspath(a)) == os.path.normcase(os.path.abspath(b))
+
+
+def exit_status(metrics):
+    """1 if the run hit an error that affects it as a whole (see RunMetrics.report_error), 0 otherwise."""
+    return 1 if metrics.run_errors else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="photo-organizer",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("source", nargs="?", help="Folder containing the files to organize.")
+    parser.add_argument("destination", help="Folder where organized files are placed.")
+    parser.add_argument("--mode", choices=("name", "date"), default="name",
+                        help="Organize by filename prefix or by date (YYYY/MM). Default: name.")
+    parser.add_argument("--copy", action="store_true", help="Copy files instead of moving them.")
+    parser.add_argument("--ext", action="append", metavar="EXTS",
+                        help="File types to include, e.g. 'jpg,mp4' (repeatable). Default: all supported types.")
+    parser.add_argument("--recursive", action="store_true", help="Include files in subfolders of the source.")
+    parser.add_argument("--max-depth", type=int, default=None, help="Deepest subfolder level to scan with --recursive.")
+    parser.add_argument("--workers", type=int, default=1, help="Files processed in parallel. Default: 1.")
+    parser.add_argument("--transfer-workers", type=int, default=None,
+                        help="Use the staged pipeline with this many transfer threads.")
+    parser.add_argument("--hardlinks", action="store_true", help="Hard link instead of copying on the same drive.")
+    parser.add_argument("--skip-duplicates", action="store_true",
+                        help="Skip files whose content already exists in the destination.")
+    verify_group = parser.add_mutually_exclusive_group()
+    verify_group.add_argument("--verify", action="store_const", const=VERIFY_CHECKSUM, default=False,
+                              help="Checksum every copy while it is written and compare it with the copy read back; "
+                                   "moves across drives delete the source only once verified.")
+    verify_group.add_argument("--verify-size", action="store_const", dest="verify", const=VERIFY_SIZE,
+                              help="Like --verify, but only check the size of every copy and that its source "
+                                   "didn't change meanwhile (no checksum, full copy speed).")
+    verify_group.add_argument("--read-back", action="store_const", dest="verify", const=VERIFY_READBACK,
+                              help="Like --verify, but read every copy back from the drive instead of the cache (slower).")
+    parser.add_argument("--no-cache", action="store_true", help="Don't use the date cache in date mode.")
+    parser.add_argument("--no-journal", action="store_true", help="Don't journal transfers (runs can't be resumed).")
+    parser.add_argument("--dry-run", action="store_true", help="Only compute and report the plan, change nothing.")
+    parser.add_argument("--save-plan", metavar="FILE", help="With --dry-run, also save the plan as JSON.")
+    parser.add_argument("--execute-plan", metavar="FILE",
+                        help="Apply a plan saved with --save-plan. Give only the destination, which must be the plan's.")
+    parser.add_argument("--resume", action="store_true", help="Finish an interrupted run into the destination.")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and organize new files as they arrive, until interrupted (SIGINT/SIGTERM).")
+    parser.add_argument("--settle", type=float, default=DEFAULT_SETTLE_SECONDS, metavar="SECONDS",
+                        help=f"With --watch, how long a file must stay unchanged before it is organized. Default: {DEFAULT_SETTLE_SECONDS:g}.")
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL, metavar="SECONDS",
+                        help=f"With --watch, time between scans when inotify is not available. Default: {DEFAULT_POLL_INTERVAL:g}.")
+    parser.add_argument("--batch-size", type=int, default=WATCH_BATCH_SIZE,
+                        help=f"With --watch, most files organized per batch. Default: {WATCH_BATCH_SIZE}.")
+    parser.add_argument("--no-inotify", action="store_true", help="With --watch, always detect new files by scanning.")
+    parser.add_argument("--quiet", action="store_true", help="Only emit progress and result events, no per-file log.")
+    parser.add_argument("--trace", action="store_true", help="Emit a trace event for every timed operation of every file.")
+    parser.add_argument("--profile", choices=PROFILERS,
+                        help="Profile the run: cprofile (organizer thread) or sampling (all threads).")
+    parser.add_argument("--profile-output", metavar="FILE",
+                        help="With --profile, also save the profile (pstats file or collapsed stacks).")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.source is None and not (args.resume or args.execute_plan):
+        parser.error("the source folder is required")
+    if args.source is not None and (args.resume or args.execute_plan):
+        parser.error("--resume and --execute-plan take only the destination folder")
+    if args.save_plan and not args.dry_run:
+        parser.error("--save-plan requires --dry-run")
+
+    reporter = JsonLinesReporter(quiet=args.quiet)
+    metrics = RunMetrics(trace=reporter.trace if args.trace else None, profile=args.profile,
+                         profile_output=args.profile_output,
+                         on_error=lambda category, message: reporter.emit("error", category=category, message=message))
+    organizer = PhotoOrganizer(metrics=metrics)
+
+    if args.resume:
+        organizer.resume(args.destination, reporter.progress, reporter.log, reporter.done)
+        emit_metrics(reporter, metrics)
+        return exit_status(metrics)
+
+    if args.execute_plan:
+        from plan import OrganizationPlan
+        try:
+            plan = OrganizationPlan.load(args.execute_plan)
+        except (OSError, ValueError, KeyError) as e:
+            reporter.emit("error", message=f"Could not load plan: {e}")
+            return 1
+        if not same_folder(args.destination, plan.destination_folder):
+            parser.error(f"the plan organizes into {plan.destination_folder}, not {args.destination}")
+        organizer.execute(plan, reporter.progress, reporter.log, reporter.done,
+                          skip_duplicates=args.skip_duplicates, use_journal=not args.no_journal)
+        emit_metrics(reporter, metrics)
+        return exit_status(metrics)
+
+    extensions = parse_extensions(args.ext)
+
+    if args.watch:
+        stop_event = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda signum, frame: stop_event.set())
+        organizer.watch(args.source, args.destination, reporter.log, reporter.batch, reporter.done, args.copy, args.mode,
+                        extensions, stop_event, workers=args.workers, use_cache=not args.no_cache, recursive=args.recursive,
+                        max_depth=args.max_depth, use_hardlinks=args.hardlinks, skip_duplicates=args.skip_duplicates,
+                        use_journal=not args.no_journal, verify=args.verify, settle_seconds=args.settle,
+                        poll_interval=args.poll_interval, batch_size=args.batch_size, use_inotify=not args.no_inotify)
+        emit_metrics(reporter, metrics)
+        return exit_status(metrics)
+
+    if args.dry_run:
+        try:
+            plan = organizer.plan(args.source, args.destination, args.mode, extensions, use_copy=args.copy,
+                                  recursive=args.recursive, max_depth=args.max_depth, use_hardlinks=args.hardlinks,
+                                  verify=args.verify)
+            if args.save_plan:
+                plan.save(args.save_plan)
+        except OSError as e:
+            reporter.emit("error", message=f"Could not compute the plan: {e}")
+            return 1
+        reporter.emit("plan", **plan.stats())
+        return exit_status(metrics)
+
+    organizer.organize_files(
+        args.source,
+        args.destination,
+        reporter.progress,
+        reporter.log,
+        reporter.done,
+        args.copy,
+        args.mode,
+        extensions,
+        workers=args.workers,
+        use_cache=not args.no_cache,
+        recursive=args.recursive,
+        max_depth=args.max_depth,
+        use_hardlinks=args.hardlinks,
+        skip_duplicates=args.skip_duplicates,
+        use_journal=not args.no_journal,
+        transfer_workers=args.transfer_workers,
+        verify=args.verify,
+    )
+    emit_metrics(reporter, metrics)
+    return exit_status(metrics)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+# destination.py
+import os
+import threading
+
+
+# Size in bits of the filter that remembers which paths a run has placed files at (4 MB whatever the run's size;
+# about 1 in 5000 lookups is a false positive at a million files, which only costs an extra ' (N)' name)
+PLACED_FILTER_BITS = 1 << 25
+PLACED_FILTER_HASHES = 4
+
+
+class _PlacedPaths:
+    """Fixed-size Bloom filter of paths. Never misses a path that was added; may rarely report one that wasn't."""
+    __slots__ = ("_bits",)
+
+    def __init__(self):
+        self._bits = bytearray(PLACED_FILTER_BITS // 8)
+
+    def add(self, path):
+        """Adds path. Returns False if it was (probably) added before."""
+        h = hash(os.path.normcase(path))
+        step = (h >> 32) | 1
+        added = False
+        for i in range(PLACED_FILTER_HASHES):
+            bit = (h + i * step) % PLACED_FILTER_BITS
+            mask = 1 << (bit & 7)
+            if not self._bits[bit >> 3] & mask:
+                self._bits[bit >> 3] |= mask
+                added = True
+        return added
+
+
+class DestinationFolders:
+    """
+    In-memory view of the destination folders touched by a run, so that on slow destinations
+    (SMB/NFS shares, where every syscall is a network round trip) the file system is asked as little as possible:
+      - folders already created or verified are remembered, so each one costs at most one mkdir per run;
+      - the names in a target folder are listed once (one scandir) and kept up to date as files are added,
+        so picking a free ' (N)' name needs no per-candidate existence checks. Listings are only made
+        (and held in memory) for folders where a free name was asked for.
+    Only valid while this run is the only writer to the folders it tracks. Safe to use from several worker threads.
+    claim_names: set for runs in which several files can have the same name (recursive scans, watch mode), so that
+    claim_name() is used and a file never replaces one placed earlier in the run.
+    """
+    def __init__(self, claim_names=False):
+        self.claim_names = claim_names
+        self._known_folders = set()
+        self._listings = {} # folder -> set of names in it
+        self._placed = _PlacedPaths() if claim_names else None
+        self._lock = threading.Lock()
+
+    def forget_folders(self):
+        """Forgets the folders and listings seen so far (they may have changed since), but not the paths claimed."""
+        with self._lock:
+            self._known_folders.clear()
+            self._listings.clear()
+
+    def is_known(self, folder):
+        return folder in self._known_folders
+
+    def ensure(self, folder):
+        """Creates folder (and missing parents) unless this run already created or verified it."""
+        if folder in self._known_folders:
+            return
+        try:
+            os.mkdir(folder) # One round trip in the common cases: new folder under an existing parent, or existing folder
+        except FileExistsError:
+            if not os.path.isdir(folder):
+                raise
+        except FileNotFoundError:
+            os.makedirs(folder, exist_ok=True) # Some parents are missing too
+
+        with self._lock:
+            self._known_folders.add(folder)
+            parent = os.path.dirname(folder)
+            while parent and parent not in self._known_folders and parent != os.path.dirname(parent):
+                self._known_folders.add(parent)
+                parent = os.path.dirname(parent)
+
+    def ensure_all(self, folders):
+        """Creates a batch of folders up front, parents before children. Returns {folder: error} for failures."""
+        errors = {}
+        for folder in sorted(set(folders)):
+            try:
+                self.ensure(folder)
+            except OSError as e:
+                errors[folder] = e
+        return errors
+
+    def reserve_unique_name(self, folder, filename):
+        """
+        Returns a path in folder for filename that no file of the folder uses yet: the name itself,
+        or 'name (N).ext' with the first free N. The name is reserved, so concurrent callers never get the same one.
+        """
+        names = self._listing(folder)
+        with self._lock:
+            if filename not in names:
+                names.add(filename)
+                return os.path.join(folder, filename)
+            base, ext = os.path.splitext(filename)
+            counter = 1
+            while f"{base} ({counter}){ext}" in names:
+                counter += 1
+            unique_name = f"{base} ({counter}){ext}"
+            names.add(unique_name)
+            return os.path.join(folder, unique_name)
+
+    def claim_name(self, folder, filename):
+        """
+        Returns the path in folder for the next file named filename: the name itself, or 'name (N).ext'
+        with the first N that this run has not placed a file at yet. Files that were in the folder before the run
+        are written over, as in runs that don't claim names, so a run that is repeated doesn't add new copies.
+        Only memory is involved (no file system calls), and concurrent callers never get the same path.
+        """
+        base, ext = os.path.splitext(filename)
+        candidate = filename
+        counter = 0
+        while True:
+            path = os.path.join(folder, candidate)
+            with self._lock:
+                if self._placed.add(path):
+                    return path
+            counter += 1
+            candidate = f"{base} ({counter}){ext}"
+
+    def add(self, folder, filename):
+        """Records that filename now exists in folder (if its listing is being kept)."""
+        with self._lock:
+            names = self._listings.get(folder)
+            if names is not None:
+                names.add(filename)
+
+    def _listing(self, folder):
+        with self._lock:
+            names = self._listings.get(folder)
+        if names is not None:
+            return names
+        try:
+            with os.scandir(folder) as it:
+                listed = {entry.name for entry in it}
+        except FileNotFoundError:
+            listed = set()
+        with self._lock:
+            return self._listings.setdefault(folder, listed) # Another thread may have listed it meanwhile
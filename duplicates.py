@@ -0,0 +1,216 @@
+# duplicates.py
+import hashlib
+import itertools
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from scanner import FileScanner
+
+
+INDEX_FILENAME = ".photo_organizer_index.sqlite"
+
+# Bookkeeping files the organizer keeps in the destination, never indexed
+INTERNAL_FILE_PREFIXES = (".photo_organizer", "photo_organizer.log")
+
+# Partial hashes cover the first and last PARTIAL_HASH_SIZE bytes of a file
+PARTIAL_HASH_SIZE = 64 * 1024
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Index writes made during a run are committed in batches of this size
+COMMIT_EVERY = 1000
+
+
+def partial_hash(file_path, size):
+    """Hashes the first and last 64 KB of a file (the whole file if it is small)."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        digest.update(f.read(PARTIAL_HASH_SIZE))
+        if size > 2 * PARTIAL_HASH_SIZE:
+            f.seek(-PARTIAL_HASH_SIZE, os.SEEK_END)
+            digest.update(f.read(PARTIAL_HASH_SIZE))
+        elif size > PARTIAL_HASH_SIZE:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def full_hash(file_path, size):
+    """Hashes the whole content of a file. For small files this is the partial hash."""
+    if size <= 2 * PARTIAL_HASH_SIZE:
+        return partial_hash(file_path, size)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DuplicateIndex:
+    """
+    Persistent index of the files in a destination folder, used to detect incoming duplicates.
+    Candidates are narrowed down by size first (no I/O), then by a partial hash of the first and last 64 KB,
+    and only then by a full content hash. Hashes are computed lazily and stored, so a destination
+    file is hashed at most once as long as it does not change.
+    Stored as SQLite inside the destination folder. Safe to use from several worker threads.
+    exclude_dirs: folders under the destination that are not indexed, such as a source folder nested inside it.
+    """
+    def __init__(self, folder, exclude_dirs=()):
+        self.folder = folder
+        self.exclude_dirs = exclude_dirs
+        self.path = os.path.join(folder, INDEX_FILENAME)
+        self._lock = threading.Lock()
+        self._uncommitted = 0
+        self._size_claims = {} # size -> [lock, number of threads holding or waiting for it]
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "dir TEXT, name TEXT, size INTEGER, mtime_ns INTEGER, partial_hash TEXT, full_hash TEXT, "
+            "PRIMARY KEY (dir, name));"
+            "CREATE INDEX IF NOT EXISTS files_by_size ON files (size);"
+        )
+        self._conn.commit()
+
+    def refresh(self):
+        """
+        Brings the index in line with the destination folder, one folder at a time.
+        Only stats files; stored hashes are kept for files whose size and mtime did not change.
+        Returns (files in index, files added or changed, files removed).
+        """
+        added = removed = 0
+        seen_dirs = set()
+        scanner = FileScanner(self.folder, max_depth=None, exclude_dirs=self.exclude_dirs)
+        with self._lock:
+            for folder, entries in itertools.groupby(scanner, key=lambda entry: os.path.dirname(entry.path)):
+                rel_dir = os.path.relpath(folder, self.folder)
+                seen_dirs.add(rel_dir)
+                known = {
+                    name: (size, mtime_ns) for name, size, mtime_ns in
+                    self._conn.execute("SELECT name, size, mtime_ns FROM files WHERE dir = ?", (rel_dir,))
+                }
+
+                changed = []
+                for entry in entries:
+                    if entry.name.startswith(INTERNAL_FILE_PREFIXES):
+                        continue
+                    try:
+                        stat_result = entry.stat()
+                    except OSError:
+                        continue
+                    current = (stat_result.st_size, stat_result.st_mtime_ns)
+                    if known.pop(entry.name, None) != current:
+                        changed.append((rel_dir, entry.name) + current)
+
+                if changed:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, NULL, NULL)", changed
+                    )
+                    added += len(changed)
+                if known: # Files that disappeared from this folder
+                    self._conn.executemany(
+                        "DELETE FROM files WHERE dir = ? AND name = ?", [(rel_dir, name) for name in known]
+                    )
+                    removed += len(known)
+
+            # Folders that no longer contain any file
+            for (rel_dir,) in self._conn.execute("SELECT DISTINCT dir FROM files").fetchall():
+                if rel_dir not in seen_dirs:
+                    removed += self._conn.execute("DELETE FROM files WHERE dir = ?", (rel_dir,)).rowcount
+
+            self._conn.commit()
+            (total,) = self._conn.execute("SELECT COUNT(*) FROM files").fetchone()
+        return total, added, removed
+
+    @contextmanager
+    def claim_size(self, size):
+        """
+        Serializes duplicate resolution of files of one size. Hold it from find_duplicate() until the file is
+        add()ed, so two identical files transferred at the same time can't both be found to be new.
+        Files of other sizes are not held up.
+        """
+        with self._lock:
+            claim = self._size_claims.get(size)
+            if claim is None:
+                claim = self._size_claims[size] = [threading.Lock(), 0]
+            claim[1] += 1
+        try:
+            with claim[0]:
+                yield
+        finally:
+            with self._lock:
+                claim[1] -= 1
+                if not claim[1]:
+                    del self._size_claims[size]
+
+    def find_duplicate(self, file_path, size):
+        """
+        Looks for an indexed file with the same content as file_path. file_path itself (or another link to it)
+        does not count as a duplicate of itself. Returns (relative path of the duplicate or None, (partial_hash, full_hash)),
+        where hashes that were not needed are None. Pass the hashes on to add() to avoid recomputing them.
+        """
+        with self._lock:
+            candidates = self._conn.execute(
+                "SELECT dir, name, partial_hash, full_hash FROM files WHERE size = ?", (size,)
+            ).fetchall()
+        if not candidates: # Unique size: no hashing needed at all
+            return None, (None, None)
+
+        incoming_partial = partial_hash(file_path, size)
+        matches = []
+        for rel_dir, name, candidate_partial, candidate_full in candidates:
+            if candidate_partial is None:
+                candidate_partial = self._hash_candidate(rel_dir, name, size, "partial_hash", partial_hash)
+            if candidate_partial == incoming_partial:
+                matches.append((rel_dir, name, candidate_full))
+        if not matches:
+            return None, (incoming_partial, None)
+
+        incoming_full = full_hash(file_path, size)
+        for rel_dir, name, candidate_full in matches:
+            if candidate_full is None:
+                candidate_full = self._hash_candidate(rel_dir, name, size, "full_hash", full_hash)
+            if candidate_full == incoming_full and not self._is_same_file(rel_dir, name, file_path):
+                return os.path.normpath(os.path.join(rel_dir, name)), (incoming_partial, incoming_full)
+        return None, (incoming_partial, incoming_full)
+
+    def add(self, dest_path, stat_result, hashes=(None, None)):
+        """Records a file that was just placed in the destination folder."""
+        rel_dir = os.path.relpath(os.path.dirname(dest_path), self.folder)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                (rel_dir, os.path.basename(dest_path), stat_result.st_size, stat_result.st_mtime_ns) + tuple(hashes)
+            )
+            self._uncommitted += 1
+            if self._uncommitted >= COMMIT_EVERY:
+                self._conn.commit()
+                self._uncommitted = 0
+
+    def flush(self):
+        """Commits the files added so far (done automatically every COMMIT_EVERY files)."""
+        with self._lock:
+            self._conn.commit()
+            self._uncommitted = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+    def _is_same_file(self, rel_dir, name, file_path):
+        try:
+            return os.path.samefile(os.path.join(self.folder, rel_dir, name), file_path)
+        except OSError:
+            return False
+
+    def _hash_candidate(self, rel_dir, name, size, column, hash_function):
+        """Computes and stores a missing hash of an indexed file. Drops the entry if the file is gone."""
+        try:
+            value = hash_function(os.path.join(self.folder, rel_dir, name), size)
+        except OSError:
+            with self._lock:
+                self._conn.execute("DELETE FROM files WHERE dir = ? AND name = ?", (rel_dir, name))
+            return None
+        with self._lock:
+            self._conn.execute(f"UPDATE files SET {column} = ? WHERE dir = ? AND name = ?", (value, rel_dir, name))
+        return value
@@ -0,0 +1,171 @@
+# exif_reader.py
+import struct
+
+
+# EXIF tags needed to reach the capture date
+EXIF_IFD_POINTER = 0x8769
+EXIF_DATETIME_ORIGINAL = 0x9003
+
+# Extensions whose headers can be parsed here without Pillow
+HEADER_EXIF_EXTENSIONS = {".jpg", ".jpeg", ".tiff", ".tif", ".webp"}
+
+# The EXIF block lives in a single APP1 segment, which is limited to 64 KB
+MAX_SEGMENT_SIZE = 64 * 1024
+MAX_IFD_ENTRIES = 1024
+MAX_DATE_LENGTH = 64
+
+
+class ExifReadError(Exception):
+    """
+    Raised when a file's header could not be parsed by the fast reader.
+    Callers should fall back to a full decoder (Pillow) in that case.
+    """
+
+
+def read_datetime_original(file_path):
+    """
+    Reads the raw EXIF DateTimeOriginal string ("YYYY:MM:DD HH:MM:SS") of a JPEG, TIFF or WebP file
+    by reading only its header structures.
+    Returns None if the file is well formed but carries no DateTimeOriginal tag,
+    and raises ExifReadError if the header could not be understood.
+    """
+    try:
+        with open(file_path, "rb") as f:
+            head = f.read(12)
+            if head[:2] == b"\xff\xd8":
+                tiff_data = _read_jpeg_exif(f)
+                if tiff_data is None:
+                    return None
+                return _find_datetime_original(lambda offset, size: tiff_data[offset:offset + size])
+            if head[:4] in (b"II*\x00", b"MM\x00*"):
+                # TIFF files are their own EXIF container, IFDs can be anywhere in the file
+                def read_at(offset, size):
+                    f.seek(offset)
+                    return f.read(size)
+                return _find_datetime_original(read_at)
+            if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+                tiff_data = _read_webp_exif(f)
+                if tiff_data is None:
+                    return None
+                return _find_datetime_original(lambda offset, size: tiff_data[offset:offset + size])
+    except (OSError, IndexError, struct.error, UnicodeDecodeError) as e:
+        raise ExifReadError(f"Could not read EXIF header of {file_path}: {e}") from e
+
+    raise ExifReadError(f"Unsupported file header: {file_path}")
+
+
+def _read_jpeg_exif(f):
+    """
+    Walks the JPEG marker segments up to the start of the image data
+    and returns the TIFF payload of the EXIF APP1 segment, or None if there is none.
+    """
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            raise ExifReadError("Invalid JPEG marker")
+        marker_type = marker[1]
+        while marker_type == 0xFF: # Fill bytes before the actual marker
+            marker_type = f.read(1)[0]
+
+        if marker_type in (0xDA, 0xD9): # Start of scan / end of image: no EXIF before the image data
+            return None
+        if 0xD0 <= marker_type <= 0xD7 or marker_type == 0x01: # Standalone markers without a length
+            continue
+
+        (length,) = struct.unpack(">H", f.read(2))
+        if length < 2:
+            raise ExifReadError("Invalid JPEG segment length")
+        if marker_type == 0xE1:
+            payload = f.read(length - 2)
+            if payload[:6] == b"Exif\x00\x00":
+                return payload[6:]
+            continue # XMP or other APP1 data, keep looking
+        f.seek(length - 2, 1)
+
+
+def _read_webp_exif(f):
+    """
+    Seeks through the RIFF chunks of an extended WebP file and returns the TIFF payload
+    of its EXIF chunk, or None if there is none.
+    """
+    first_chunk = f.read(8)
+    if len(first_chunk) < 8:
+        raise ExifReadError("Truncated WebP header")
+    if first_chunk[:4] != b"VP8X":
+        return None # Simple (lossy/lossless) WebP files cannot carry EXIF
+
+    chunk_header = first_chunk
+    while len(chunk_header) == 8:
+        fourcc = chunk_header[:4]
+        (size,) = struct.unpack("<I", chunk_header[4:])
+        if fourcc == b"EXIF":
+            if size > MAX_SEGMENT_SIZE:
+                raise ExifReadError("WebP EXIF chunk too large")
+            payload = f.read(size)
+            if payload[:6] == b"Exif\x00\x00": # Some writers keep the JPEG style prefix
+                payload = payload[6:]
+            return payload
+        f.seek(size + (size & 1), 1) # Chunks are padded to an even size
+        chunk_header = f.read(8)
+    return None
+
+
+def _find_datetime_original(read_at):
+    """
+    Follows IFD0 -> EXIF IFD -> DateTimeOriginal inside a TIFF structure.
+    read_at(offset, size) returns bytes relative to the start of the TIFF header.
+    """
+    header = read_at(0, 8)
+    if len(header) < 8:
+        raise ExifReadError("Truncated TIFF header")
+    if header[:2] == b"II":
+        endian = "<"
+    elif header[:2] == b"MM":
+        endian = ">"
+    else:
+        raise ExifReadError("Invalid TIFF byte order")
+    magic, ifd0_offset = struct.unpack(endian + "HI", header[2:8])
+    if magic != 42:
+        raise ExifReadError("Invalid TIFF magic number")
+
+    entry = _find_ifd_entry(read_at, endian, ifd0_offset, EXIF_IFD_POINTER)
+    if entry is None:
+        return None
+    _, _, raw_value = entry
+    (exif_ifd_offset,) = struct.unpack(endian + "I", raw_value)
+
+    entry = _find_ifd_entry(read_at, endian, exif_ifd_offset, EXIF_DATETIME_ORIGINAL)
+    if entry is None:
+        return None
+    value_type, count, raw_value = entry
+    if value_type != 2 or count > MAX_DATE_LENGTH: # Must be a reasonably sized ASCII value
+        raise ExifReadError("Unexpected DateTimeOriginal format")
+
+    if count <= 4:
+        value = raw_value[:count]
+    else:
+        (value_offset,) = struct.unpack(endian + "I", raw_value)
+        value = read_at(value_offset, count)
+    return value.rstrip(b"\x00 ").decode("ascii")
+
+
+def _find_ifd_entry(read_at, endian, ifd_offset, wanted_tag):
+    """
+    Returns (type, count, raw 4-byte value) of a tag in the IFD at ifd_offset, or None if it is absent.
+    """
+    count_data = read_at(ifd_offset, 2)
+    if len(count_data) < 2:
+        raise ExifReadError("Truncated IFD")
+    (entry_count,) = struct.unpack(endian + "H", count_data)
+    if entry_count > MAX_IFD_ENTRIES:
+        raise ExifReadError("Implausible IFD entry count")
+
+    entries = read_at(ifd_offset + 2, entry_count * 12)
+    if len(entries) < entry_count * 12:
+        raise ExifReadError("Truncated IFD entries")
+    for i in range(0, len(entries), 12):
+        tag, value_type, count = struct.unpack(endian + "HHI", entries[i:i + 8])
+        if tag == wanted_tag:
+            return value_type, count, entries[i + 8:i + 12]
+    return None
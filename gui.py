@@ -1,5 +1,6 @@
 # gui.py
 import os
+import queue
 import threading
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox
@@ -7,6 +8,17 @@ from ttkbootstrap import Style
 from ttkbootstrap.constants import *
 
 from organizer import PhotoOrganizer, SUPPORTED_EXTENSIONS 
+from metrics import RunMetrics
+from scanner import FileScanner
+from journal import has_unfinished_work
+from transfer import VERIFY_READBACK
+
+
+# Background thread -> UI delivery: events are drained on a fixed tick instead of per file
+UI_TICK_MS = 100
+# The log box keeps only the most recent lines; the full log is written to LOG_FILENAME in the destination
+MAX_LOG_LINES = 2000
+LOG_FILENAME = "photo_organizer.log"
 
 
 # --- Tooltip Class (Integrated for robustness) ---
@@ -64,7 +76,7 @@ class PhotoOrganizerGUI:
     def __init__(self):
         self.app = tk.Tk()
         self.app.title("📁 Photo Organizer")
-        self.app.geometry("700x800") 
+        self.app.geometry("700x940") 
         self.app.resizable(False, False)
 
         if os.path.exists("icon.ico"):
@@ -73,6 +85,12 @@ class PhotoOrganizerGUI:
         self.style = Style("superhero")
         self.style.master = self.app 
 
+        # Thread-safe channel from the organizer thread to the UI
+        self._events = queue.SimpleQueue()
+        self._pending_progress = None
+        self._log_file = None
+        self._run_metrics = None # Metrics of the run in progress, summarized when it ends
+
         self._create_widgets()
 
     def _create_widgets(self):
@@ -128,6 +146,63 @@ class PhotoOrganizerGUI:
         copy_checkbox.grid(row=2, column=0, columnspan=3, padx=10, pady=10, sticky="w")
         Tooltip(copy_checkbox, "If checked, files will be copied to the destination, leaving originals in the source folder.")
 
+        # Hard links instead of copies
+        self.hardlink_var = tk.BooleanVar()
+        hardlink_checkbox = ttk.Checkbutton(options_frame, text="Hard link instead of copying (same drive only)",
+                                            variable=self.hardlink_var, bootstyle="secondary")
+        hardlink_checkbox.grid(row=3, column=0, columnspan=3, padx=10, pady=5, sticky="w")
+        Tooltip(hardlink_checkbox, "When copying on the same drive, link the organized file to the original instead of duplicating its data.")
+
+        # Parallel workers
+        ttk.Label(options_frame, text="Parallel workers:").grid(row=4, column=0, padx=10, pady=5, sticky="w")
+        self.workers_var = tk.IntVar(value=1)
+        workers_spinbox = ttk.Spinbox(options_frame, from_=1, to=32, width=5, textvariable=self.workers_var)
+        workers_spinbox.grid(row=4, column=1, padx=5, pady=5, sticky="w")
+        Tooltip(workers_spinbox, "Number of files processed at the same time. Higher values speed up large folders on fast disks.")
+
+        # Separate transfer threads (pipelined mode)
+        ttk.Label(options_frame, text="Transfer threads:").grid(row=8, column=0, padx=10, pady=5, sticky="w")
+        self.transfer_workers_var = tk.IntVar(value=0)
+        transfer_workers_spinbox = ttk.Spinbox(options_frame, from_=0, to=32, width=5, textvariable=self.transfer_workers_var)
+        transfer_workers_spinbox.grid(row=8, column=1, padx=5, pady=5, sticky="w")
+        Tooltip(transfer_workers_spinbox, "0 = off. Otherwise, reading dates and copying/moving run as separate stages that overlap, "
+                                          "with this many threads copying. Useful when writing to a slow network or USB drive.")
+
+
+        # Metadata cache
+        self.cache_var = tk.BooleanVar(value=True)
+        cache_checkbox = ttk.Checkbutton(options_frame, text="Cache dates between runs (Date mode)",
+                                         variable=self.cache_var, bootstyle="secondary")
+        cache_checkbox.grid(row=5, column=0, columnspan=3, padx=10, pady=5, sticky="w")
+        Tooltip(cache_checkbox, "Remembers the date found for each unchanged file, so re-runs skip reading EXIF data.")
+
+        # Include subfolders
+        self.recursive_var = tk.BooleanVar()
+        recursive_checkbox = ttk.Checkbutton(options_frame, text="Include subfolders (e.g. DCIM/100XXXXX)",
+                                             variable=self.recursive_var, bootstyle="secondary")
+        recursive_checkbox.grid(row=6, column=0, columnspan=3, padx=10, pady=5, sticky="w")
+        Tooltip(recursive_checkbox, "If checked, files in all subfolders of the source folder are organized too.")
+
+        # Duplicate detection
+        self.skip_duplicates_var = tk.BooleanVar()
+        duplicates_checkbox = ttk.Checkbutton(options_frame, text="Skip files already in the destination (duplicates)",
+                                              variable=self.skip_duplicates_var, bootstyle="secondary")
+        duplicates_checkbox.grid(row=7, column=0, columnspan=3, padx=10, pady=5, sticky="w")
+        Tooltip(duplicates_checkbox, "Skips files whose content already exists anywhere in the destination, and never overwrites a different file with the same name.")
+
+        # Verified transfers
+        self.verify_var = tk.BooleanVar()
+        verify_checkbox = ttk.Checkbutton(options_frame, text="Verify copies (checksum)",
+                                          variable=self.verify_var, bootstyle="secondary")
+        verify_checkbox.grid(row=9, column=0, padx=10, pady=5, sticky="w")
+        Tooltip(verify_checkbox, "Checksums every copied file while it is written and compares it with the copy read back. "
+                                 "When moving to another drive, the original is only deleted once its copy is verified.")
+        self.read_back_var = tk.BooleanVar()
+        read_back_checkbox = ttk.Checkbutton(options_frame, text="Read back from the drive",
+                                             variable=self.read_back_var, bootstyle="secondary")
+        read_back_checkbox.grid(row=9, column=1, columnspan=2, padx=10, pady=5, sticky="w")
+        Tooltip(read_back_checkbox, "Verifies copies by reading them back from the drive itself rather than from memory. "
+                                    "Also catches corruption on the way to flaky USB drives, but copying takes about twice as long.")
 
         # --- File Type Filters Frame ---
         filter_frame = ttk.LabelFrame(self.app, text="File Type Filters", padding=(20, 10))
@@ -171,6 +246,11 @@ class PhotoOrganizerGUI:
         self.organize_button.pack(side=LEFT, padx=10)
         Tooltip(self.organize_button, "Click to start the file organization process.")
 
+        self.dry_run_button = ttk.Button(control_buttons_frame, text="🔍 Dry Run", bootstyle="info-outline",
+                                         width=20, command=self.start_dry_run)
+        self.dry_run_button.pack(side=LEFT, padx=10)
+        Tooltip(self.dry_run_button, "Preview what would be organized (file count, size, folders) without changing any files.")
+
         theme_toggle_btn = ttk.Button(control_buttons_frame, text="🌙 Toggle Theme", bootstyle="warning-outline",
                                       width=20, command=self.toggle_theme)
         theme_toggle_btn.pack(side=LEFT, padx=10)
@@ -214,48 +294,238 @@ class PhotoOrganizerGUI:
         self.style.theme_use(new_theme)
 
     def _update_log(self, message):
-        """Callback to update the log_box from the background thread."""
-        self.log_box.config(state=NORMAL) 
-        self.log_box.insert(tk.END, message)
-        self.log_box.see(tk.END) 
-        self.log_box.config(state=DISABLED) 
+        """Callback for the background thread: queues a log message for the next UI tick."""
+        self._events.put(("log", message))
 
     def _update_progress(self, value):
-        """Callback to update the progress_bar from the background thread."""
-        self.progress_var.set(value)
+        """Callback for the background thread: only the latest value is shown on the next UI tick."""
+        self._pending_progress = value
 
     def _on_organization_done(self, processed, skipped):
-        """Callback to run in the main thread when organization is complete."""
-        self.organize_button.config(state=NORMAL) 
-        self.progress_var.set(0) 
-        self.app.after(0, lambda: self._update_log("\nOrganization process finished.\n"))
-        
-        self.app.after(0, lambda: messagebox.showinfo("Done", f"Processed: {processed} file(s)\nSkipped: {skipped} file(s)"))
+        """Callback for the background thread: queues the end of the run for the next UI tick."""
+        self._events.put(("done", (processed, skipped)))
+
+    def _drain_events(self):
+        """Runs on the main thread every UI_TICK_MS while organizing, applying queued events in bulk."""
+        messages = []
+        finished = None
+        while True:
+            try:
+                kind, payload = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "log":
+                messages.append(payload)
+            else: # "done", "plan" or "count" ends the background task
+                finished = (kind, payload)
+
+        if messages:
+            self._append_log(messages)
+
+        progress, self._pending_progress = self._pending_progress, None
+        if progress is not None:
+            self.progress_var.set(progress)
+
+        if finished is None:
+            self.app.after(UI_TICK_MS, self._drain_events)
+        elif finished[0] == "done":
+            self._finish_organization(*finished[1])
+        elif finished[0] == "count":
+            self._confirm_organization(*finished[1])
+        else:
+            self._finish_dry_run(finished[1])
+
+    def _append_log(self, messages):
+        """Writes messages to the log file and shows them in the log box, which is capped at MAX_LOG_LINES."""
+        if self._log_file is not None:
+            self._log_file.write("".join(messages))
 
-    def start_organizing_process(self):
-        src = self.source_entry.get()
-        dest = self.dest_entry.get()
-        use_copy = self.copy_var.get()
-        organization_mode = self.organization_mode_var.get()
+        self.log_box.config(state=NORMAL) 
+        self.log_box.insert(tk.END, "".join(messages[-MAX_LOG_LINES:]))
+        excess_lines = int(self.log_box.index("end-1c").split(".")[0]) - MAX_LOG_LINES
+        if excess_lines > 0:
+            self.log_box.delete("1.0", f"{excess_lines + 1}.0")
+        self.log_box.see(tk.END) 
+        self.log_box.config(state=DISABLED) 
+
+    def _open_log_file(self, dest):
+        """Opens the full log file in the destination folder, if it can be created."""
+        try:
+            os.makedirs(dest, exist_ok=True)
+            log_path = os.path.join(dest, LOG_FILENAME)
+            self._log_file = open(log_path, "a", encoding="utf-8")
+            return log_path
+        except OSError:
+            self._log_file = None
+            return None
+
+    def _finish_organization(self, processed, skipped):
+        """Runs on the main thread once organization is complete."""
+        self._set_running(False)
+        self.progress_var.set(0) 
+        summary = f"Processed: {processed} file(s)\nSkipped: {skipped} file(s)"
+        if self._run_metrics is not None:
+            summary += "\n\n" + self._run_metrics.summary()
+            self._run_metrics = None
+        self._append_log(["\nOrganization process finished.\n", summary + "\n"])
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = None
         
-        selected_extensions = {ext for ext, var in self.file_type_vars.items() if var.get()}
+        messagebox.showinfo("Done", summary)
+
+    def _get_options(self):
+        """
+        Reads and validates the options from the UI.
+        Returns them as a dict, or None (after showing an error) if they are not usable.
+        """
+        try:
+            workers = max(1, int(self.workers_var.get()))
+        except (tk.TclError, ValueError):
+            workers = 1
+        try:
+            transfer_workers = max(0, int(self.transfer_workers_var.get()))
+        except (tk.TclError, ValueError):
+            transfer_workers = 0
+
+        options = {
+            "src": self.source_entry.get(),
+            "dest": self.dest_entry.get(),
+            "use_copy": self.copy_var.get(),
+            "organization_mode": self.organization_mode_var.get(),
+            "selected_extensions": {ext for ext, var in self.file_type_vars.items() if var.get()},
+            "workers": workers,
+            "transfer_workers": transfer_workers,
+            "use_cache": self.cache_var.get(),
+            "recursive": self.recursive_var.get(),
+            "use_hardlinks": self.hardlink_var.get(),
+            "skip_duplicates": self.skip_duplicates_var.get(),
+            "verify": VERIFY_READBACK if self.read_back_var.get() else self.verify_var.get(),
+        }
         
-        if not selected_extensions:
+        if not options["selected_extensions"]:
             messagebox.showerror("Error", "Please select at least one file type to organize.")
+            return None
+
+        if not os.path.isdir(options["src"]):
+            messagebox.showerror("Error", f"Source folder does not exist:\n{options['src']}")
+            return None
+
+        return options
+
+    def _set_running(self, running):
+        """Enables or disables the buttons that start a run."""
+        state = DISABLED if running else NORMAL
+        self.organize_button.config(state=state)
+        self.dry_run_button.config(state=state)
+
+    def _clear_log(self):
+        self.log_box.config(state=NORMAL)
+        self.log_box.delete(1.0, tk.END)
+        self.log_box.config(state=DISABLED)
+
+    def start_dry_run(self):
+        """Computes the organization plan in the background and shows its statistics. Nothing is moved or copied."""
+        options = self._get_options()
+        if options is None:
             return
 
-        if not os.path.isdir(src):
-            messagebox.showerror("Error", f"Source folder does not exist:\n{src}")
+        self._clear_log()
+        self._update_log("Planning (dry run, no files will be changed)...\n")
+        self.app.after(UI_TICK_MS, self._drain_events)
+        self._set_running(True)
+
+        def compute_plan():
+            try:
+                plan = PhotoOrganizer().plan(
+                    options["src"], options["dest"], options["organization_mode"], options["selected_extensions"],
+                    use_copy=options["use_copy"], recursive=options["recursive"], use_hardlinks=options["use_hardlinks"],
+                    verify=options["verify"]
+                )
+            except Exception as e:
+                plan = e
+            self._events.put(("plan", plan))
+
+        threading.Thread(target=compute_plan, daemon=True).start()
+
+    def _finish_dry_run(self, plan):
+        """Runs on the main thread once the dry-run plan is ready."""
+        self._set_running(False)
+        if isinstance(plan, Exception):
+            self._append_log([f"Could not compute the plan: {plan}\n"])
+            messagebox.showerror("Dry Run", f"Could not compute the plan:\n{plan}")
             return
-        
-        files_in_source = [f for f in os.listdir(src) if os.path.isfile(os.path.join(src, f))]
-        if not files_in_source:
-            messagebox.showinfo("Info", "Source folder is empty. No files to organize.")
+
+        summary = plan.summary()
+        self._append_log([summary + "\n"])
+        messagebox.showinfo("Dry Run", summary)
+
+    def _start_resume(self, dest):
+        """Finishes an interrupted run into dest in the background."""
+        self._clear_log()
+        log_path = self._open_log_file(dest)
+        self._update_log("Resuming interrupted organization...\n")
+        if log_path:
+            self._update_log(f"Full log: {log_path}\n")
+        self.app.after(UI_TICK_MS, self._drain_events)
+        self._set_running(True)
+
+        self._run_metrics = RunMetrics()
+        threading.Thread(
+            target=PhotoOrganizer(metrics=self._run_metrics).resume,
+            args=(dest, self._update_progress, self._update_log, self._on_organization_done),
+            daemon=True
+        ).start()
+
+    def start_organizing_process(self):
+        options = self._get_options()
+        if options is None:
+            return
+        src, dest = options["src"], options["dest"]
+
+        if dest and has_unfinished_work(dest):
+            if messagebox.askyesno("Resume Organization",
+                                   "A previous organization into this destination was interrupted.\n"
+                                   "Do you want to finish it first?"):
+                self._start_resume(dest)
+                return
+
+        # Counting walks the whole source (every subfolder of a card dump when recursive), so it runs in the background
+        self._clear_log()
+        self._update_log("Counting files...\n")
+        self.app.after(UI_TICK_MS, self._drain_events)
+        self._set_running(True)
+
+        def count_files():
+            try:
+                file_count = FileScanner(src, extensions=options["selected_extensions"],
+                                         max_depth=None if options["recursive"] else 0,
+                                         exclude_dirs=[dest] if dest else ()).count()
+            except Exception as e:
+                file_count = e
+            self._events.put(("count", (options, file_count)))
+
+        threading.Thread(target=count_files, daemon=True).start()
+
+    def _confirm_organization(self, options, file_count):
+        """Runs on the main thread once the source is counted: asks for confirmation, then starts organizing."""
+        self._set_running(False)
+        src, dest = options["src"], options["dest"]
+        use_copy = options["use_copy"]
+        organization_mode = options["organization_mode"]
+        selected_extensions = options["selected_extensions"]
+
+        if isinstance(file_count, Exception):
+            self._append_log([f"Could not read the source folder: {file_count}\n"])
+            messagebox.showerror("Error", f"Could not read the source folder:\n{file_count}")
+            return
+        if not file_count:
+            messagebox.showinfo("Info", "No files of the selected types found in the source folder.")
             return
 
         operation_type = "copy" if use_copy else "move"
         confirm_msg = (
-            f"You are about to {operation_type} {len(files_in_source)} file(s)\n"
+            f"You are about to {operation_type} {file_count} file(s)\n"
             f"from:\n'{src}'\n"
             f"into:\n'{dest}'\n"
             f"organized by: '{organization_mode.capitalize()}'\n"
@@ -264,14 +534,17 @@ class PhotoOrganizerGUI:
         if not messagebox.askyesno("Confirm Organization", confirm_msg):
             return 
 
-        self.log_box.config(state=NORMAL)
-        self.log_box.delete(1.0, tk.END)
-        self.log_box.config(state=DISABLED)
-        self.app.after(0, lambda: self._update_log("Starting organization...\n"))
+        self._clear_log()
+        log_path = self._open_log_file(dest) if dest else None
+        self._update_log("Starting organization...\n")
+        if log_path:
+            self._update_log(f"Full log: {log_path}\n")
+        self.app.after(UI_TICK_MS, self._drain_events)
 
-        self.organize_button.config(state=DISABLED) 
+        self._set_running(True)
 
-        organizer = PhotoOrganizer() 
+        self._run_metrics = RunMetrics()
+        organizer = PhotoOrganizer(metrics=self._run_metrics)
 
         threading.Thread(
             target=organizer.organize_files,
@@ -283,8 +556,18 @@ class PhotoOrganizerGUI:
                 self._on_organization_done, 
                 use_copy,
                 organization_mode,
-                selected_extensions         
+                selected_extensions
             ),
+            kwargs={
+                "workers": options["workers"],
+                "transfer_workers": options["transfer_workers"] or None,
+                "use_cache": options["use_cache"],
+                "recursive": options["recursive"],
+                "use_hardlinks": options["use_hardlinks"],
+                "skip_duplicates": options["skip_duplicates"],
+                "verify": options["verify"],
+                "file_count": file_count, # Already counted, no need for the organizer to walk the source again
+            },
             daemon=True 
         ).start()
 
@@ -0,0 +1,136 @@
+# journal.py
+import json
+import os
+import threading
+
+
+JOURNAL_FILENAME = ".photo_organizer_journal.jsonl"
+# Plan being executed (see PhotoOrganizer.execute), kept next to the journal so resume can finish it
+PLAN_FILENAME = ".photo_organizer_plan.json"
+
+# Records are flushed to the OS on every write (enough to survive the app being closed or crashing)
+# and fsync'ed to disk every DEFAULT_FSYNC_EVERY records (to survive a power loss without slowing every file down).
+DEFAULT_FSYNC_EVERY = 100
+
+
+class PendingOperation:
+    """A transfer whose intent was journaled but whose completion was not."""
+    __slots__ = ("op_id", "src", "dst", "use_copy", "size")
+
+    def __init__(self, op_id, src, dst, use_copy, size):
+        self.op_id = op_id
+        self.src = src
+        self.dst = dst
+        self.use_copy = use_copy
+        self.size = size
+
+
+def read_journal(folder):
+    """
+    Reads the journal of a destination folder.
+    Returns (pending operations, set of source paths that have a journal record, highest operation id).
+    A truncated last line (crash during a write) is ignored.
+    """
+    intents = {}
+    journaled_sources = set()
+    last_id = 0
+    try:
+        f = open(os.path.join(folder, JOURNAL_FILENAME), "r", encoding="utf-8")
+    except FileNotFoundError:
+        return [], journaled_sources, last_id
+
+    with f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record[0] == "I": # Intent: ["I", id, src, dst, use_copy, size]
+                _, op_id, src, dst, use_copy, size = record
+                intents[op_id] = PendingOperation(op_id, src, dst, use_copy, size)
+                journaled_sources.add(src)
+                last_id = max(last_id, op_id)
+            else: # Completion: ["D", id, success]
+                intents.pop(record[1], None)
+    return list(intents.values()), journaled_sources, last_id
+
+
+def _ends_with_newline(file_path):
+    with open(file_path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def has_unfinished_work(folder):
+    """True if a previous run in this destination folder was interrupted."""
+    return bool(read_journal(folder)[0]) or os.path.exists(os.path.join(folder, PLAN_FILENAME))
+
+
+class Journal:
+    """
+    Append-only write-ahead journal of the transfers made into a destination folder.
+    Every transfer is recorded as an intent before it starts and as completed once it is done,
+    so an interrupted run can be finished by PhotoOrganizer.resume(). Safe to use from several worker threads.
+    """
+    def __init__(self, folder, fsync_every=DEFAULT_FSYNC_EVERY):
+        self.folder = folder
+        self.path = os.path.join(folder, JOURNAL_FILENAME)
+        self.fsync_every = fsync_every
+        pending, _, last_id = read_journal(folder)
+        # Work left over by an interrupted run must survive until resume() has dealt with it
+        self._earlier_work_unfinished = bool(pending) or os.path.exists(os.path.join(folder, PLAN_FILENAME))
+        self._next_id = last_id + 1
+        self._open_ops = set()
+        self._unsynced = 0
+        self._lock = threading.Lock()
+        self._file = open(self.path, "a", encoding="utf-8")
+        if self._file.tell() > 0 and not _ends_with_newline(self.path):
+            self._file.write("\n") # Terminate a record cut short by a crash, so it doesn't swallow the next one
+
+    def begin(self, src, dst, use_copy, size):
+        """
+        Records the intent to transfer src to dst. Returns the operation id to pass to complete().
+        Paths are recorded as absolute paths, so resume() works from any current directory.
+        """
+        src, dst = os.path.abspath(src), os.path.abspath(dst)
+        with self._lock:
+            op_id = self._next_id
+            self._next_id += 1
+            self._open_ops.add(op_id)
+            self._write(["I", op_id, src, dst, use_copy, size])
+        return op_id
+
+    def complete(self, op_id, success=True):
+        """Records that an operation is finished (successfully or not) and must not be replayed."""
+        with self._lock:
+            self._open_ops.discard(op_id)
+            self._write(["D", op_id, success])
+
+    def earlier_work_resolved(self):
+        """Called by resume once it has dealt with everything an interrupted run left unfinished."""
+        with self._lock:
+            self._earlier_work_unfinished = False
+
+    def close(self):
+        """
+        Syncs and closes the journal. If nothing is left unfinished, the journal
+        (and any saved plan) is removed, since there is nothing to resume.
+        """
+        with self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            if not self._open_ops and not self._earlier_work_unfinished:
+                for filename in (JOURNAL_FILENAME, PLAN_FILENAME):
+                    try:
+                        os.remove(os.path.join(self.folder, filename))
+                    except FileNotFoundError:
+                        pass
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
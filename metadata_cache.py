@@ -0,0 +1,114 @@
+# metadata_cache.py
+import os
+import sqlite3
+import threading
+import time
+
+
+CACHE_FILENAME = ".photo_organizer_cache.sqlite"
+
+# Eviction policy: entries not seen by any run for this long are dropped,
+# and the table never grows past MAX_ENTRIES (least recently seen go first).
+DEFAULT_MAX_AGE_DAYS = 90
+DEFAULT_MAX_ENTRIES = 2_000_000
+
+# Writes are buffered and flushed in batches to keep SQLite out of the per-file path
+FLUSH_EVERY = 1000
+
+# The database file is rebuilt (VACUUM) once eviction removes this share of its rows
+VACUUM_THRESHOLD = 0.25
+
+
+class MetadataCache:
+    """
+    On-disk cache mapping a source file, identified by (path, size, mtime_ns, inode),
+    to the date folder ("YYYY/MM") resolved for it. Stored as SQLite inside the destination folder.
+    Safe to use from several worker threads.
+    """
+    def __init__(self, folder, max_age_days=DEFAULT_MAX_AGE_DAYS, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = os.path.join(folder, CACHE_FILENAME)
+        self.max_age_seconds = max_age_days * 24 * 3600
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._now = int(time.time())
+        self._lock = threading.Lock()
+        self._pending_puts = []
+        self._pending_touches = []
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, inode INTEGER, "
+            "date_folder TEXT, last_seen INTEGER)"
+        )
+        self._conn.commit()
+
+    def get(self, file_path, stat_result):
+        """
+        Returns the cached date folder for file_path, or None if it is unknown or the file changed.
+        """
+        key = os.path.abspath(file_path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, inode, date_folder FROM entries WHERE path = ?", (key,)
+            ).fetchone()
+            if row is None or row[:3] != (stat_result.st_size, stat_result.st_mtime_ns, stat_result.st_ino):
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._pending_touches.append((self._now, key))
+            self._flush_if_needed()
+            return row[3]
+
+    def put(self, file_path, stat_result, date_folder):
+        """Records the date folder resolved for file_path."""
+        key = os.path.abspath(file_path)
+        with self._lock:
+            self._pending_puts.append(
+                (key, stat_result.st_size, stat_result.st_mtime_ns, stat_result.st_ino, date_folder, self._now)
+            )
+            self._flush_if_needed()
+
+    def flush(self):
+        """Writes pending puts and touches to the database (done automatically every FLUSH_EVERY of them)."""
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        """Flushes pending writes, applies the eviction policy and closes the database."""
+        with self._lock:
+            self._flush()
+            self._evict()
+            self._conn.close()
+
+    def _flush_if_needed(self):
+        if len(self._pending_puts) + len(self._pending_touches) >= FLUSH_EVERY:
+            self._flush()
+
+    def _flush(self):
+        if self._pending_puts:
+            self._conn.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)", self._pending_puts)
+            self._pending_puts = []
+        if self._pending_touches:
+            self._conn.executemany("UPDATE entries SET last_seen = ? WHERE path = ?", self._pending_touches)
+            self._pending_touches = []
+        self._conn.commit()
+
+    def _evict(self):
+        """Drops stale entries and compacts the database file when a large share was removed."""
+        (total,) = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+        removed = self._conn.execute(
+            "DELETE FROM entries WHERE last_seen < ?", (self._now - self.max_age_seconds,)
+        ).rowcount
+
+        overflow = total - removed - self.max_entries
+        if overflow > 0:
+            removed += self._conn.execute(
+                "DELETE FROM entries WHERE path IN (SELECT path FROM entries ORDER BY last_seen LIMIT ?)", (overflow,)
+            ).rowcount
+        self._conn.commit()
+
+        if total and removed / total >= VACUUM_THRESHOLD:
+            self._conn.execute("VACUUM")
@@ -0,0 +1,254 @@
+# metrics.py
+import io
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from plan import format_size
+
+
+# Phases timed by PhotoOrganizer, in the order they are reported
+PHASES = ("stat", "metadata", "pillow", "subfolder", "mkdir", "duplicate_check", "journal", "transfer")
+
+PROFILERS = ("cprofile", "sampling")
+
+
+class _PhaseTimer:
+    """Context manager returned by RunMetrics.phase()."""
+    __slots__ = ("metrics", "phase", "path", "start")
+
+    def __init__(self, metrics, phase, path):
+        self.metrics = metrics
+        self.phase = phase
+        self.path = path
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.metrics.record(self.phase, time.perf_counter() - self.start, self.path)
+        return False
+
+
+class PhaseStats:
+    """Aggregate timings of one phase. slowest holds the (seconds, path) of the slowest files."""
+    __slots__ = ("count", "total", "max", "slowest")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.slowest = []
+
+
+class RunMetrics:
+    """
+    Optional metrics sink for PhotoOrganizer (pass it as PhotoOrganizer(metrics=...)).
+    Records per-file timings of every phase (stat, date extraction, subfolder resolution, folder creation,
+    transfer, ...), the bytes moved by each transfer strategy and the number of errors per category.
+    Phases can nest: "subfolder" includes "metadata", which includes "pillow".
+    Safe to use from several worker threads.
+
+    trace: optional callable trace(phase, path, seconds), called for every timed operation.
+    keep_slowest: number of slowest files remembered per phase.
+    profile: None, "cprofile" (deterministic, profiles the thread that runs the organizer) or
+             "sampling" (samples the stacks of all threads, so it also sees worker and pipeline threads).
+    profile_output: optional file the profile is written to: pstats data for cprofile,
+                    collapsed stacks (flame graph input) for sampling.
+    on_error: optional callable on_error(category, message), called for every error that affects a whole run
+              rather than a single file (unreadable source folder, unexpected failure). Those are also kept in run_errors.
+    """
+    def __init__(self, trace=None, keep_slowest=5, profile=None, profile_interval=0.005, profile_output=None, on_error=None):
+        if profile not in (None,) + PROFILERS:
+            raise ValueError(f"Unknown profiler: {profile}")
+        self.trace = trace
+        self.keep_slowest = keep_slowest
+        self.profile = profile
+        self.profile_interval = profile_interval
+        self.profile_output = profile_output
+        self.phases = {}
+        self.bytes_by_strategy = Counter()
+        self.files_by_strategy = Counter()
+        self.errors = Counter()
+        self.on_error = on_error
+        self.run_errors = [] # (category, message)
+        self.wall_seconds = 0.0
+        self.profile_report = None
+        self._run_start = None
+        self._profiler = None
+        self._lock = threading.Lock()
+
+    def phase(self, name, path=None):
+        """Times the body of a with block as one operation of the given phase."""
+        return _PhaseTimer(self, name, path)
+
+    def record(self, phase, seconds, path=None):
+        with self._lock:
+            stats = self.phases.get(phase)
+            if stats is None:
+                stats = self.phases[phase] = PhaseStats()
+            stats.count += 1
+            stats.total += seconds
+            if seconds > stats.max:
+                stats.max = seconds
+            if path is not None and self.keep_slowest:
+                slowest = stats.slowest
+                if len(slowest) < self.keep_slowest or seconds > slowest[-1][0]:
+                    slowest.append((seconds, path))
+                    slowest.sort(reverse=True)
+                    del slowest[self.keep_slowest:]
+        if self.trace is not None:
+            self.trace(phase, path, seconds)
+
+    def add_transfer(self, strategy, num_bytes):
+        with self._lock:
+            self.files_by_strategy[strategy] += 1
+            self.bytes_by_strategy[strategy] += num_bytes
+
+    def count_error(self, category, count=1):
+        with self._lock:
+            self.errors[category] += count
+
+    def report_error(self, category, message):
+        """Records an error that affects the whole run (counted in errors too)."""
+        with self._lock:
+            self.errors[category] += 1
+            self.run_errors.append((category, message))
+        if self.on_error is not None:
+            self.on_error(category, message)
+
+    def start_run(self):
+        """Called by the organizer when a run starts. Starts the profiler, if one was requested."""
+        self._run_start = time.perf_counter()
+        if self.profile == "cprofile":
+            import cProfile # Only imported when asked for: it and pstats add noticeably to start-up time
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.profile == "sampling":
+            self._profiler = SamplingProfiler(self.profile_interval)
+            self._profiler.start()
+
+    def finish_run(self):
+        """Called by the organizer when a run ends. Stops the profiler and keeps its report."""
+        if self._run_start is not None:
+            self.wall_seconds += time.perf_counter() - self._run_start
+            self._run_start = None
+        profiler, self._profiler = self._profiler, None
+        if profiler is None:
+            return
+        if isinstance(profiler, SamplingProfiler):
+            profiler.stop()
+            self.profile_report = profiler.report()
+            if self.profile_output:
+                profiler.save_collapsed(self.profile_output)
+        else:
+            profiler.disable()
+            import pstats
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(25)
+            self.profile_report = out.getvalue()
+            if self.profile_output:
+                profiler.dump_stats(self.profile_output)
+
+    def stats(self):
+        """All the metrics as plain data (JSON serializable)."""
+        with self._lock:
+            return {
+                "wall_seconds": self.wall_seconds,
+                "phases": {
+                    name: {
+                        "count": stats.count,
+                        "total_seconds": stats.total,
+                        "mean_seconds": stats.total / stats.count if stats.count else 0.0,
+                        "max_seconds": stats.max,
+                        "slowest": [[path, seconds] for seconds, path in stats.slowest],
+                    }
+                    for name, stats in self._ordered_phases()
+                },
+                "bytes": sum(self.bytes_by_strategy.values()),
+                "bytes_by_strategy": dict(self.bytes_by_strategy),
+                "files_by_strategy": dict(self.files_by_strategy),
+                "errors": dict(self.errors),
+            }
+
+    def summary(self):
+        """Human readable summary of a run, shown by the GUI and the CLI at the end."""
+        stats = self.stats()
+        wall = stats["wall_seconds"]
+        total_bytes = stats["bytes"]
+        lines = [f"Time: {wall:.1f}s, transferred {format_size(total_bytes)}"
+                 + (f" ({format_size(total_bytes / wall)}/s)" if wall > 0 and total_bytes else "")]
+        for name, phase in stats["phases"].items():
+            lines.append(f"  {name}: {phase['total_seconds']:.2f}s over {phase['count']} op(s), "
+                         f"max {phase['max_seconds'] * 1000:.0f} ms")
+        for strategy, num_bytes in sorted(stats["bytes_by_strategy"].items()):
+            lines.append(f"  {strategy}: {stats['files_by_strategy'][strategy]} file(s), {format_size(num_bytes)}")
+        if stats["errors"]:
+            lines.append("Errors/skips: " + ", ".join(f"{category}: {count}" for category, count
+                                                      in sorted(stats["errors"].items())))
+        return "\n".join(lines)
+
+    def _ordered_phases(self):
+        known = [(name, self.phases[name]) for name in PHASES if name in self.phases]
+        return known + [(name, stats) for name, stats in self.phases.items() if name not in PHASES]
+
+
+class SamplingProfiler:
+    """
+    Low-overhead statistical profiler: a background thread snapshots the stack of every other thread
+    every `interval` seconds and counts, per function, the samples where it was running (self)
+    or on the stack (cumulative).
+    """
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = 0
+        self.stacks = Counter() # Collapsed stack ("outer;...;inner") -> samples
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+    def report(self, limit=25):
+        """Functions that were running in the most samples, as text."""
+        self_samples, cumulative_samples = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            functions = stack.split(";")
+            self_samples[functions[-1]] += count
+            for function in set(functions):
+                cumulative_samples[function] += count
+        total = max(self.samples, 1)
+        lines = [f"{self.samples} samples every {self.interval * 1000:.0f} ms (all threads, idle waits included)",
+                 f"{'self %':>7} {'cum %':>7}  function"]
+        for function, count in self_samples.most_common(limit):
+            lines.append(f"{count / total * 100:>7.1f} {cumulative_samples[function] / total * 100:>7.1f}  {function}")
+        return "\n".join(lines)
+
+    def save_collapsed(self, file_path):
+        """Writes the stacks in the collapsed format read by flamegraph.pl and speedscope."""
+        with open(file_path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
@@ -0,0 +1,84 @@
+# name_classifier.py
+import os
+import re
+from functools import lru_cache
+
+
+# Trailing ' (N)' or ' NNN' left on a prefix, e.g. "Party (2)" or "IMG 0001"
+TRAILING_NUMBER_PATTERN = re.compile(r'\s*(\(\d+\)|\d+)$')
+# Characters that are not allowed in folder names on Windows
+INVALID_FOLDER_CHARS_PATTERN = re.compile(r'[\\/:*?"<>|]')
+
+# Distinct prefixes remembered between calls. Camera and event prefixes repeat a lot
+# ("IMG", "DSC", "Wedding"), so even a small memo serves nearly every file.
+PREFIX_MEMO_SIZE = 16384
+
+# Returned by _folder_for_prefix when the prefix is only digits/parentheses,
+# in which case the whole base name is used instead
+_USE_BASE_NAME = object()
+
+
+def subfolder_for_name(filename):
+    """
+    Name mode folder of a file: the part of its name before the first '_' (or '-'),
+    without a trailing number or ' (N)', and without characters that folder names can't contain.
+    Returns None if no usable folder name is left.
+    """
+    base_name_without_ext = os.path.splitext(filename)[0]
+    if '_' in base_name_without_ext:
+        prefix = base_name_without_ext.split('_', 1)[0]
+    elif '-' in base_name_without_ext:
+        prefix = base_name_without_ext.split('-', 1)[0]
+    else:
+        prefix = base_name_without_ext
+
+    if prefix and prefix[-1] in "0123456789":
+        # Counters make prefixes like "IMG 0001" unique: drop the digits first so the memo still hits.
+        # This is what TRAILING_NUMBER_PATTERN would remove, unless more (non-ASCII) digits precede them.
+        trimmed = prefix.rstrip("0123456789")
+        subfolder_name = _folder_for_prefix(prefix) if trimmed[-1:].isdigit() else _folder_for_trimmed_prefix(trimmed)
+    else:
+        subfolder_name = _folder_for_prefix(prefix)
+    if subfolder_name is _USE_BASE_NAME:
+        # Rare, and the base name is usually unique, so not worth a memo entry
+        subfolder_name = _clean_folder_name(base_name_without_ext.strip())
+    return subfolder_name
+
+
+@lru_cache(maxsize=PREFIX_MEMO_SIZE)
+def _folder_for_prefix(prefix):
+    subfolder_name = TRAILING_NUMBER_PATTERN.sub('', prefix).strip()
+    if not subfolder_name:
+        return _USE_BASE_NAME
+    return _clean_folder_name(subfolder_name)
+
+
+@lru_cache(maxsize=PREFIX_MEMO_SIZE)
+def _folder_for_trimmed_prefix(trimmed_prefix):
+    subfolder_name = trimmed_prefix.strip()
+    if not subfolder_name:
+        return _USE_BASE_NAME
+    return _clean_folder_name(subfolder_name)
+
+
+def _clean_folder_name(subfolder_name):
+    subfolder_name = INVALID_FOLDER_CHARS_PATTERN.sub('', subfolder_name)
+    if not subfolder_name or subfolder_name.strip(". ") == "":
+        return None
+    return subfolder_name
+
+
+def classify_names(filenames):
+    """
+    Batch version of subfolder_for_name for a whole list of filenames.
+    Returns (folder per filename, with None for unusable names; distinct folders in first-seen order),
+    so callers can create every folder once before transferring anything.
+    """
+    folders = []
+    distinct_folders = {} # dict keeps first-seen order
+    for filename in filenames:
+        subfolder_name = subfolder_for_name(filename)
+        folders.append(subfolder_name)
+        if subfolder_name is not None:
+            distinct_folders[subfolder_name] = None
+    return folders, list(distinct_folders)
@@ -1,10 +1,34 @@
 # organizer.py
 import os
 import shutil
-import re
-from PIL import Image
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
-from PIL.ExifTags import TAGS # Import for get_exif_date
+from itertools import islice
+
+from exif_reader import read_datetime_original, ExifReadError, HEADER_EXIF_EXTENSIONS
+from name_classifier import subfolder_for_name, classify_names
+from video_reader import read_creation_datetime, VideoReadError, VIDEO_DATE_EXTENSIONS
+from metadata_cache import MetadataCache
+from scanner import FileScanner
+from watcher import FolderWatcher, DEFAULT_SETTLE_SECONDS, DEFAULT_POLL_INTERVAL
+from destination import DestinationFolders
+from transfer import FileTransfer, TransferVerificationError
+from duplicates import DuplicateIndex
+from plan import OrganizationPlan, PlanItem, has_target_clashes
+from pipeline import Pipeline, Stage
+from journal import Journal, read_journal, has_unfinished_work, PLAN_FILENAME
+
+
+# Names classified per batch by plan() in name mode
+NAME_BATCH_SIZE = 1024
+
+# Most files organized per batch in watch mode
+WATCH_BATCH_SIZE = 64
+
+# Stands in for a phase timer when no metrics sink is attached
+_NO_PHASE_TIMER = nullcontext()
 
 
 # Define a global set of supported extensions
@@ -29,155 +53,790 @@ class PhotoOrganizer:
     """
     Contains the core logic for organizing photos and videos.
     It does not interact directly with the GUI.
+    metrics: optional RunMetrics (see metrics.py) that records phase timings, bytes and errors of every run.
     """
-    def __init__(self):
+    def __init__(self, metrics=None):
         # Initialize internal lists of supported extensions based on the global set
         self.image_extensions = {ext for ext in SUPPORTED_EXTENSIONS if ext in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp']}
         self.video_extensions = {ext for ext in SUPPORTED_EXTENSIONS if ext in ['.mp4', '.mov', '.avi', '.mkv', '.webm', '.m4v']}
+        # Date cache for the current run (set up by organize_files in date mode)
+        self.metadata_cache = None
+        # Copy/move strategy selection for the current run (set up by organize_files)
+        self.file_transfer = None
+        # Index of destination contents for the current run (set up by organize_files if skipping duplicates)
+        self.duplicate_index = None
+        # Write-ahead journal of the current run's transfers (set up by organize_files unless disabled)
+        self.journal = None
+        # Destination folders created/verified and listed by the current run (set up by organize_files)
+        self.destination_folders = None
+        self.metrics = metrics
+
+    def _phase(self, name, path=None):
+        """Times a block as one operation of a phase when a metrics sink is attached."""
+        metrics = self.metrics
+        return metrics.phase(name, path) if metrics is not None else _NO_PHASE_TIMER
 
+    def _count_error(self, category, count=1):
+        if self.metrics is not None:
+            self.metrics.count_error(category, count)
 
-    def _get_date_from_file(self, file_path):
+
+    def _get_date_from_file(self, file_path, stat_result=None):
         """
-        Attempts to get the creation date from EXIF data (for images)
-        or falls back to file modification date. Returns date as YYYY/MM string.
+        Returns the date folder (YYYY/MM) of a file, served from the metadata cache
+        when one is active and the file is unchanged since it was cached.
+        stat_result can be passed in when the caller already has it (e.g. from os.scandir).
+        """
+        with self._phase("metadata", file_path):
+            return self._get_cached_date(file_path, stat_result)
+
+    def _get_cached_date(self, file_path, stat_result):
+        cache = self.metadata_cache
+        if cache is None:
+            return self._read_date_from_file(file_path, stat_result)
+
+        if stat_result is None:
+            try:
+                stat_result = os.stat(file_path)
+            except OSError:
+                return self._read_date_from_file(file_path)
+
+        date_folder = cache.get(file_path, stat_result)
+        if date_folder is None:
+            date_folder = self._read_date_from_file(file_path, stat_result)
+            if date_folder is not None:
+                cache.put(file_path, stat_result, date_folder)
+        return date_folder
+
+
+    def _read_date_from_file(self, file_path, stat_result=None):
+        """
+        Attempts to get the creation date from EXIF data (for images) or from the container
+        header (for MP4/MOV/MKV videos), or falls back to file modification date. Returns date as YYYY/MM string.
         """
         file_extension = os.path.splitext(file_path)[1].lower()
 
+        # Try to get the recording date of videos, which their mtime doesn't survive copies with
+        if file_extension in VIDEO_DATE_EXTENSIONS:
+            try:
+                created = read_creation_datetime(file_path)
+                if created is not None:
+                    return created.strftime("%Y/%m")
+            except VideoReadError:
+                pass # Unreadable container, fall back to modification date
+
         # Try to get EXIF date for images
         if file_extension in self.image_extensions:
-            try:
-                img = Image.open(file_path)
-                exif_data = img._getexif()
-                if exif_data:
-                    # 0x9003 is DateTimeOriginal tag
-                    if 0x9003 in exif_data:
-                        date_str = exif_data[0x9003]
-                        # EXIF date format is "YYYY:MM:DD HH:MM:SS"
-                        dt_object = datetime.strptime(date_str, "%Y:%m:%d %H:%M:%S")
-                        return dt_object.strftime("%Y/%m")
-            except Exception:
-                pass # Fallback to modification date if EXIF fails or not found
+            date_str = None
+            use_pillow = True
+            if file_extension in HEADER_EXIF_EXTENSIONS:
+                try:
+                    # Fast path: read only the header structures, no full image decode
+                    date_str = read_datetime_original(file_path)
+                    use_pillow = False
+                except ExifReadError:
+                    pass # Header could not be parsed, let Pillow have a go
+            if use_pillow:
+                with self._phase("pillow", file_path):
+                    date_str = self._get_exif_date_with_pillow(file_path)
+
+            if date_str:
+                try:
+                    # EXIF date format is "YYYY:MM:DD HH:MM:SS"
+                    dt_object = datetime.strptime(date_str, "%Y:%m:%d %H:%M:%S")
+                    return dt_object.strftime("%Y/%m")
+                except ValueError:
+                    pass # Fallback to modification date if the EXIF date is malformed
 
         # Fallback to file modification date
         try:
-            mod_timestamp = os.path.getmtime(file_path)
+            mod_timestamp = stat_result.st_mtime if stat_result is not None else os.path.getmtime(file_path)
             dt_object = datetime.fromtimestamp(mod_timestamp)
             return dt_object.strftime("%Y/%m")
         except Exception:
             return None # Could not get any date
 
 
-    def _get_subfolder_name(self, filename, organization_mode, file_path=None):
+    def _get_exif_date_with_pillow(self, file_path):
+        """
+        Reads the raw DateTimeOriginal string through Pillow. Slower than the header-only reader,
+        but understands every format Pillow does. Returns None if no date is found.
+        """
+        try:
+            from PIL import Image # Imported on first use: keeps startup fast for runs that never need Pillow
+            with Image.open(file_path) as img:
+                exif_data = img._getexif()
+        except Exception:
+            return None
+        if exif_data and 0x9003 in exif_data: # 0x9003 is DateTimeOriginal tag
+            return exif_data[0x9003]
+        return None
+
+
+    def _get_subfolder_name(self, filename, organization_mode, file_path=None, stat_result=None):
         """
         Determines the subfolder name based on the chosen organization mode.
         """
         if organization_mode == "date":
-            date_folder = self._get_date_from_file(file_path)
+            date_folder = self._get_date_from_file(file_path, stat_result)
             if date_folder:
                 return date_folder
             else:
                 # Fallback for files without readable dates (e.g., 'Unknown Date')
                 return "Unknown Date"
 
-        # Default to "name" organization mode if not "date"
-        base_name_without_ext = os.path.splitext(filename)[0]
+        # Default to "name" organization mode if not "date" (precompiled and memoized, see name_classifier)
+        return subfolder_for_name(filename)
 
-        initial_folder_candidate = ""
-        if '_' in base_name_without_ext:
-            initial_folder_candidate = base_name_without_ext.split('_')[0]
-        elif '-' in base_name_without_ext:
-            initial_folder_candidate = base_name_without_ext.split('-')[0]
-        else:
-            initial_folder_candidate = base_name_without_ext
+    def _classify_file(self, entry, organization_mode):
+        """
+        Decides which subfolder a single scanned file (os.DirEntry) belongs in.
+        Returns (subfolder_name, None) on success or (None, skip_message) if the file is skipped.
+        """
+        stat_result = None
+        if organization_mode == "date":
+            try:
+                with self._phase("stat", entry.path):
+                    stat_result = entry.stat() # Cached by the DirEntry, no extra syscall on Windows
+            except OSError:
+                pass
 
-        # Remove trailing patterns like ' (N)' or ' NNN' from the candidate
-        subfolder_name = re.sub(r'\s*(\(\d+\)|\d+)$', '', initial_folder_candidate).strip()
+        with self._phase("subfolder", entry.path):
+            subfolder_name = self._get_subfolder_name(entry.name, organization_mode, entry.path, stat_result)
+        if subfolder_name is None: # Indicates an invalid name for organization
+            self._count_error("invalid_name")
+            return None, f"Skipped (could not determine subfolder name): {entry.name}\n"
 
-        # Fallback if the name becomes empty after stripping numbers/parentheses
-        if not subfolder_name:
-            subfolder_name = base_name_without_ext.strip()
+        return subfolder_name, None
+
+    def _transfer_file(self, entry, target_subfolder_path, subfolder_name, use_copy):
+        """
+        Copies or moves a single scanned file into its (already existing) subfolder,
+        using the cheapest strategy the file transfer of the current run can find.
+        Returns (success, log_message).
+        """
+        return self._transfer_entry(entry, target_subfolder_path, subfolder_name, use_copy)[:2]
 
-        # Clean up the subfolder name to remove invalid characters for folder names
-        subfolder_name = re.sub(r'[\\/:*?"<>|]', '', subfolder_name)
+    def _transfer_entry(self, entry, target_subfolder_path, subfolder_name, use_copy):
+        """
+        Does the work of _transfer_file. Returns (success, log_message, destination path, size in bytes),
+        where the destination path is None if nothing was transferred.
+        """
+        filename = entry.name
+        journal = self.journal
+        op_id = None
+        dest_file_path = None
+        size = 0
+        try:
+            dest_file_path = os.path.join(target_subfolder_path, filename)
+            with self._phase("stat", entry.path):
+                src_stat = entry.stat()
+            size = src_stat.st_size
 
-        # Final check for empty or invalid subfolder name after all cleaning
-        if not subfolder_name or subfolder_name.strip(". ") == "":
-            return None # Indicate an invalid name
+            duplicate_index = self.duplicate_index
+            # Identical files in flight on other workers must not both pass the duplicate check
+            with duplicate_index.claim_size(size) if duplicate_index is not None else nullcontext():
+                if duplicate_index is not None:
+                    with self._phase("duplicate_check", entry.path):
+                        duplicate_path, hashes = duplicate_index.find_duplicate(entry.path, src_stat.st_size)
+                    if duplicate_path is not None:
+                        self._count_error("duplicate")
+                        return False, f"Skipped (duplicate of {duplicate_path}): {filename}\n", None, size
+                    # Same name but different content: keep both files
+                    dest_file_path = self.destination_folders.reserve_unique_name(target_subfolder_path, filename)
+                elif self.destination_folders.claim_names:
+                    # Same-named files from different source folders (e.g. DCIM/100CANON, 101CANON) must not replace each other
+                    dest_file_path = self.destination_folders.claim_name(target_subfolder_path, filename)
 
-        return subfolder_name
+                if journal is not None:
+                    with self._phase("journal"):
+                        op_id = journal.begin(entry.path, dest_file_path, use_copy, src_stat.st_size)
+                with self._phase("transfer", entry.path):
+                    strategy = self.file_transfer.transfer(entry.path, dest_file_path, src_stat)
+                if self.metrics is not None:
+                    self.metrics.add_transfer(strategy, size)
+                if duplicate_index is not None:
+                    duplicate_index.add(dest_file_path, os.stat(dest_file_path), hashes)
+            filename = os.path.basename(dest_file_path)
+            self.destination_folders.add(target_subfolder_path, filename)
+            result = True, f"{'Copied' if use_copy else 'Moved'}: {filename} -> {subfolder_name}/ [{strategy}]\n", dest_file_path, size
+        except TransferVerificationError as e:
+            self._count_error("verification")
+            result = False, f"Verification failed for {filename}, source kept: {e}\n", None, size
+        except PermissionError as e:
+            self._count_error("permission")
+            result = False, f"Permission error {'copying' if use_copy else 'moving'} {filename}: {e}\n", None, size
+        except shutil.Error as e:
+            self._count_error("file_operation")
+            result = False, f"File operation error for {filename}: {e}\n", None, size
+        except Exception as e:
+            self._count_error("unexpected")
+            result = False, f"Unexpected error {'copying' if use_copy else 'moving'} {filename}: {e}\n", None, size
 
-    def organize_files(self, source_folder, destination_folder, progress_callback, log_callback, done_callback, use_copy, organization_mode, selected_extensions):
+        # Failed transfers count as finished too: resume only replays operations that were interrupted
+        if op_id is not None:
+            with self._phase("journal"):
+                journal.complete(op_id, result[0])
+        return result
+
+    def _make_subfolder(self, target_subfolder_path):
+        """
+        Creates a destination subfolder (and its parents) if it doesn't exist yet.
+        Folders this run already created or verified are not touched again.
+        """
+        destination_folders = self.destination_folders
+        if destination_folders.is_known(target_subfolder_path):
+            return
+        try:
+            with self._phase("mkdir", target_subfolder_path):
+                destination_folders.ensure(target_subfolder_path)
+        except Exception:
+            self._count_error("mkdir")
+            raise
+
+    def _organize_sequential(self, entries, destination_folder, use_copy, organization_mode):
+        """
+        Processes files one at a time. Yields (success, log_message) per file.
+        """
+        for entry in entries:
+            filename, file_path = entry.name, entry.path
+
+            subfolder_name, skip_message = self._classify_file(entry, organization_mode)
+            if subfolder_name is None:
+                yield False, skip_message
+                continue
+
+            target_subfolder_path = os.path.join(destination_folder, subfolder_name)
+            try:
+                self._make_subfolder(target_subfolder_path)
+            except Exception as e:
+                yield False, f"Error creating folder for {filename}: {e}\n"
+                continue
+
+            yield self._transfer_file(entry, target_subfolder_path, subfolder_name, use_copy)
+
+    def _organize_parallel(self, entries, destination_folder, use_copy, organization_mode, workers):
+        """
+        Processes files on a bounded thread pool. Metadata extraction and transfers run on
+        the pool, while destination subfolders are created once, from the calling thread.
+        Yields (success, log_message) per file in completion order.
+        """
+        max_in_flight = workers * 4 # Keeps the number of queued tasks bounded on huge folders
+        entry_iter = iter(entries)
+        in_flight = {}
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            def submit_classify_tasks():
+                while len(in_flight) < max_in_flight:
+                    entry = next(entry_iter, None)
+                    if entry is None:
+                        return
+                    future = pool.submit(self._classify_file, entry, organization_mode)
+                    in_flight[future] = ("classify", entry)
+
+            submit_classify_tasks()
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, entry = in_flight.pop(future)
+                    if stage == "transfer":
+                        yield future.result()
+                        continue
+
+                    subfolder_name, skip_message = future.result()
+                    if subfolder_name is None:
+                        yield False, skip_message
+                        continue
+
+                    target_subfolder_path = os.path.join(destination_folder, subfolder_name)
+                    try:
+                        self._make_subfolder(target_subfolder_path)
+                    except Exception as e:
+                        yield False, f"Error creating folder for {entry.name}: {e}\n"
+                        continue
+
+                    future = pool.submit(self._transfer_file, entry, target_subfolder_path, subfolder_name, use_copy)
+                    in_flight[future] = ("transfer", entry)
+                submit_classify_tasks()
+
+    def _organize_pipelined(self, entries, destination_folder, use_copy, organization_mode, classify_workers, transfer_workers):
+        """
+        Processes files through a staged pipeline: scan -> classify -> mkdir -> transfer -> verify.
+        Each stage has its own threads and is connected to the next by a bounded queue, so reading metadata
+        from the source and writing to the destination overlap while memory stays bounded.
+        Yields (success, log_message) per file in completion order.
+        """
+        def classify(entry):
+            subfolder_name, skip_message = self._classify_file(entry, organization_mode)
+            if subfolder_name is None:
+                return True, (False, skip_message)
+            return False, (entry, subfolder_name)
+
+        def make_folder(task):
+            entry, subfolder_name = task
+            target_subfolder_path = os.path.join(destination_folder, subfolder_name)
+            try:
+                self._make_subfolder(target_subfolder_path)
+            except Exception as e:
+                return True, (False, f"Error creating folder for {entry.name}: {e}\n")
+            return False, (entry, target_subfolder_path, subfolder_name)
+
+        def transfer(task):
+            success, message, dest_file_path, size = self._transfer_entry(*task, use_copy)
+            if not success:
+                return True, (False, message)
+            return False, (message, dest_file_path, size)
+
+        def verify(task):
+            message, dest_file_path, size = task
+            try:
+                dest_size = os.stat(dest_file_path).st_size
+            except OSError as e:
+                return True, (False, f"Verification failed for {os.path.basename(dest_file_path)}: {e}\n")
+            if dest_size != size:
+                return True, (False, f"Verification failed for {os.path.basename(dest_file_path)}: "
+                                     f"expected {size} bytes, found {dest_size}\n")
+            return True, (True, message)
+
+        stages = [
+            Stage("classify", classify, classify_workers),
+            Stage("mkdir", make_folder, 1),
+            Stage("transfer", transfer, transfer_workers),
+            Stage("verify", verify, 1),
+        ]
+        yield from Pipeline(entries, stages, queue_size=4 * max(classify_workers, transfer_workers))
+
+    def organize_files(self, source_folder, destination_folder, progress_callback, log_callback, done_callback, use_copy, organization_mode, selected_extensions, workers=1, use_cache=True, recursive=False, max_depth=None, use_hardlinks=False, skip_duplicates=False, use_journal=True, transfer_workers=None, verify=False, file_count=None):
         """
         Main organization logic.
+        Files are streamed from the source folder (and its subfolders if recursive, down to max_depth levels),
+        so transfers start before the scan is finished.
+        With workers > 1, metadata extraction and file transfers run on a thread pool of that size.
+        With transfer_workers set, files go through a staged pipeline instead, where metadata extraction uses
+        `workers` threads and transfers use `transfer_workers` threads (see _organize_pipelined).
+        In date mode, resolved dates are cached in the destination folder unless use_cache is False.
+        Copies use reflinks/copy_file_range where possible, or hard links if use_hardlinks is True
+        and source and destination are on the same device.
+        With skip_duplicates, files whose content already exists anywhere in the destination are skipped,
+        and name clashes with different content get a ' (N)' suffix instead of overwriting.
+        In recursive runs, where files from different source folders can share a name, a file never replaces
+        one placed earlier in the same run either: it gets a ' (N)' suffix too.
+        Unless use_journal is False, every transfer is journaled in the destination so an interrupted run
+        can be finished with resume().
+        With verify (True or "checksum" to checksum every copy and its read-back, "size" for a size and stat check
+        only, or "readback" to read the checksummed copy back from the device), copies that move bytes are verified,
+        and moves across devices only delete the source once its copy is verified (see FileTransfer).
+        file_count: number of files the scan is expected to yield, if the caller has already counted them;
+        progress is then based on it instead of a separate counting pass over the source.
+        Callbacks are always invoked from the thread that called organize_files.
         """
         processed, skipped = 0, 0
         try:
-            # Create destination folder if it doesn't exist
-            os.makedirs(destination_folder, exist_ok=True)
+            self._open_run(destination_folder, use_copy, use_hardlinks, skip_duplicates,
+                           organization_mode == "date" and use_cache, use_journal, log_callback, verify=verify,
+                           claim_names=recursive, source_folder=source_folder)
 
-            files = [f for f in os.listdir(source_folder) if os.path.isfile(os.path.join(source_folder, f))]
-            total_files = len(files)
+            # Folder read errors are reported from this thread: in pipelined mode the scan runs on the pipeline's feeder thread
+            scan_errors = deque()
+            scanner = FileScanner(
+                source_folder,
+                extensions=selected_extensions,
+                max_depth=max_depth if recursive else 0,
+                exclude_dirs=[destination_folder], # Never re-scan files we have just organized
+                onerror=scan_errors.append
+            )
+
+            # Cheap name-only pass, so progress can be reported while the real scan streams
+            total_files = scanner.count() if file_count is None else file_count
             if total_files == 0:
-                log_callback("No files found in source folder to organize.\n")
-                done_callback(processed, skipped)
-                return
+                for _ in scanner: # Nothing to organize, but unselected files still count as skipped
+                    pass
+                self._report_scan_errors(scan_errors, log_callback)
+                skipped = scanner.filtered
+                if skipped:
+                    self._count_error("file_type", skipped)
+                log_callback("No files of the selected types found in source folder to organize.\n")
+                return # done_callback is still called once, from the finally block
 
-            for i, filename in enumerate(files):
-                file_path = os.path.join(source_folder, filename)
-                _, ext = os.path.splitext(filename)
-                ext = ext.lower()
+            if transfer_workers:
+                results = self._organize_pipelined(scanner, destination_folder, use_copy, organization_mode,
+                                                   max(1, workers or 1), transfer_workers)
+            elif workers and workers > 1:
+                results = self._organize_parallel(scanner, destination_folder, use_copy, organization_mode, workers)
+            else:
+                results = self._organize_sequential(scanner, destination_folder, use_copy, organization_mode)
 
-                # Filter by selected file types
-                if ext not in selected_extensions:
+            for i, (success, message) in enumerate(results):
+                if scan_errors:
+                    self._report_scan_errors(scan_errors, log_callback)
+                if success:
+                    processed += 1
+                else:
                     skipped += 1
-                    log_callback(f"Skipped (not selected file type): {filename}\n")
-                    # Update progress even for skipped files to show overall progress
-                    progress_callback((i + 1) / total_files * 100)
-                    continue
+                log_callback(message)
 
-                subfolder_name = self._get_subfolder_name(filename, organization_mode, file_path)
+                # Update progress for each file, skipped ones included, to show overall progress
+                progress_value = min((i + 1) / total_files * 100, 100)
+                progress_callback(progress_value)
+            self._report_scan_errors(scan_errors, log_callback)
 
-                if subfolder_name is None: # Indicates an invalid name for organization
-                    skipped += 1
-                    log_callback(f"Skipped (could not determine subfolder name): {filename}\n")
-                    progress_callback((i + 1) / total_files * 100)
-                    continue
+            if scanner.filtered:
+                skipped += scanner.filtered
+                self._count_error("file_type", scanner.filtered)
+                log_callback(f"Skipped (not selected file type): {scanner.filtered} file(s)\n")
+            if self.file_transfer.strategy_counts:
+                log_callback(f"Transfer strategies: {self.file_transfer.summary()}\n")
 
-                target_subfolder_path = os.path.join(destination_folder, subfolder_name)
-                
-                try:
-                    os.makedirs(target_subfolder_path, exist_ok=True)
-                except Exception as e:
-                    skipped += 1
-                    log_callback(f"Error creating folder for {filename}: {e}\n")
-                    progress_callback((i + 1) / total_files * 100)
-                    continue
+        except Exception as e:
+            # Catch any unexpected errors during the thread execution and report them
+            self._report_run_error("unexpected", f"An unexpected error occurred during organization: {e}\n", log_callback)
+        finally:
+            self._close_run(log_callback)
+            done_callback(processed, skipped)
+
+    def watch(self, source_folder, destination_folder, log_callback, batch_callback, done_callback, use_copy, organization_mode, selected_extensions, stop_event, workers=1, use_cache=True, recursive=False, max_depth=None, use_hardlinks=False, skip_duplicates=False, use_journal=True, verify=False, settle_seconds=DEFAULT_SETTLE_SECONDS, poll_interval=DEFAULT_POLL_INTERVAL, batch_size=WATCH_BATCH_SIZE, use_inotify=True):
+        """
+        Watch mode: keeps organizing files as they arrive in source_folder until stop_event (a threading.Event) is set.
+        New and changed files are detected by a FolderWatcher (inotify where available, periodic scandir snapshots
+        otherwise) and organized once they have stopped changing for settle_seconds, in batches of at most batch_size.
+        Files already in the source when watching starts are organized first. Files that are skipped, or that stay
+        in the source in copy mode, are only picked up again if they change.
+        The other options are those of organize_files. The transfer strategy, duplicate index and date cache stay
+        open for the whole session and are saved after every batch; every batch gets its own journal, and destination
+        folders are checked again for every batch, since they may have changed while the watcher was idle.
+        A file never replaces one organized earlier in the session (recursive or not): it gets a ' (N)' suffix instead.
+        batch_callback(processed, skipped) is called after every batch and done_callback(processed, skipped)
+        with the totals once watching stops. Callbacks are always invoked from the thread that called watch.
+        """
+        processed, skipped = 0, 0
+        watcher = None
+        try:
+            self._open_run(destination_folder, use_copy, use_hardlinks, skip_duplicates,
+                           organization_mode == "date" and use_cache, False, log_callback, verify=verify,
+                           claim_names=True, source_folder=source_folder) # Uploads with the same name are normal in a hot folder
+            watcher = FolderWatcher(
+                source_folder,
+                stop_event,
+                extensions=selected_extensions,
+                max_depth=max_depth if recursive else 0,
+                exclude_dirs=[destination_folder], # Never pick up files we have just organized
+                settle_seconds=settle_seconds,
+                poll_interval=poll_interval,
+                use_inotify=use_inotify,
+                onerror=lambda e: self._report_run_error("source_folder", f"Watcher: {e}\n", log_callback)
+            )
+            log_callback(f"Watching {source_folder} for new files ({watcher.backend})\n")
 
+            for batch in watcher.batches(batch_size):
+                self.destination_folders.forget_folders()
+                if use_journal:
+                    self.journal = Journal(destination_folder)
+                batch_processed, batch_skipped = 0, 0
                 try:
-                    dest_file_path = os.path.join(target_subfolder_path, filename)
-                    if use_copy:
-                        shutil.copy2(file_path, dest_file_path)
-                        log_callback(f"Copied: {filename} -> {subfolder_name}/\n")
+                    if workers and workers > 1:
+                        results = self._organize_parallel(batch, destination_folder, use_copy, organization_mode, workers)
                     else:
-                        shutil.move(file_path, dest_file_path)
-                        log_callback(f"Moved: {filename} -> {subfolder_name}/\n")
+                        results = self._organize_sequential(batch, destination_folder, use_copy, organization_mode)
+                    for success, message in results:
+                        if success:
+                            batch_processed += 1
+                        else:
+                            batch_skipped += 1
+                        log_callback(message)
+                finally:
+                    self._close_journal(log_callback)
+                    self._save_run(log_callback)
+                processed += batch_processed
+                skipped += batch_skipped
+                batch_callback(batch_processed, batch_skipped)
+
+            if self.file_transfer.strategy_counts:
+                log_callback(f"Transfer strategies: {self.file_transfer.summary()}\n")
+
+        except Exception as e:
+            self._report_run_error("unexpected", f"An unexpected error occurred while watching: {e}\n", log_callback)
+        finally:
+            if watcher is not None:
+                watcher.close()
+            self._close_run(log_callback)
+            done_callback(processed, skipped)
+
+    def _report_scan_errors(self, scan_errors, log_callback):
+        """Logs the folder read errors the scanner has queued so far."""
+        while scan_errors:
+            self._report_run_error("source_folder", f"Could not read folder: {scan_errors.popleft()}\n", log_callback)
+
+    def _report_run_error(self, category, message, log_callback=None):
+        """Logs an error that affects the whole run rather than one file, and reports it to the metrics sink."""
+        if log_callback is not None:
+            log_callback(message)
+        if self.metrics is not None:
+            self.metrics.report_error(category, message.strip())
+
+    def plan(self, source_folder, destination_folder, organization_mode, selected_extensions, use_copy=False, recursive=False, max_depth=None, use_hardlinks=False, verify=False):
+        """
+        First phase of the two-phase API: decides where every file goes without changing anything on disk.
+        Only stats files (and reads image headers in date mode). Returns an OrganizationPlan,
+        which can be inspected, saved, and applied later with execute().
+        All paths in the plan are absolute, so a saved plan can be applied from any current directory.
+        """
+        source_folder, destination_folder = os.path.abspath(source_folder), os.path.abspath(destination_folder)
+        plan = OrganizationPlan(source_folder, destination_folder, organization_mode, use_copy, use_hardlinks, verify)
+        file_transfer = FileTransfer(use_copy, use_hardlinks, verify)
+
+        def folder_error(e):
+            plan.skipped.append((e.filename, f"Could not read folder: {e}"))
+            self._report_run_error("source_folder", f"Could not read folder: {e}")
+
+        scanner = FileScanner(
+            source_folder,
+            extensions=selected_extensions,
+            max_depth=max_depth if recursive else 0,
+            exclude_dirs=[destination_folder],
+            onerror=folder_error
+        )
+
+        if organization_mode == "date":
+            classified = (self._classify_file(entry, organization_mode) + (entry,) for entry in scanner)
+        else:
+            classified = self._classify_names_in_batches(scanner)
+
+        for subfolder_name, skip_message, entry in classified:
+            if subfolder_name is None:
+                plan.skipped.append((entry.path, skip_message.strip()))
+                continue
+            try:
+                stat_result = entry.stat()
+            except OSError as e:
+                plan.skipped.append((entry.path, f"Could not read file: {e}"))
+                continue
+
+            target_subfolder_path = os.path.join(destination_folder, subfolder_name)
+            strategy = file_transfer.predict(stat_result, target_subfolder_path)
+            plan.items.append(PlanItem(entry.path, os.path.join(target_subfolder_path, entry.name),
+                                       strategy, stat_result.st_size, stat_result.st_dev))
+
+        plan.filtered = scanner.filtered
+        return plan
+
+    def _classify_names_in_batches(self, entries):
+        """
+        Name mode classification of a stream of entries, one batch of NAME_BATCH_SIZE names at a time
+        (so the stream is never held in memory as a whole). Yields (subfolder_name, skip_message, entry).
+        """
+        entries = iter(entries)
+        while True:
+            batch = list(islice(entries, NAME_BATCH_SIZE))
+            if not batch:
+                return
+            subfolder_names, _ = classify_names([entry.name for entry in batch])
+            for subfolder_name, entry in zip(subfolder_names, batch):
+                if subfolder_name is None:
+                    yield None, f"Skipped (could not determine subfolder name): {entry.name}\n", entry
+                else:
+                    yield subfolder_name, None, entry
+
+    def execute(self, plan, progress_callback, log_callback, done_callback, skip_duplicates=False, use_journal=True):
+        """
+        Second phase of the two-phase API: applies an OrganizationPlan.
+        Operations are grouped by source device and target folder, and each target folder is created once.
+        Files the plan skipped are counted as skipped.
+        Unless use_journal is False, the plan is saved in the destination and every transfer is journaled,
+        so an interrupted execution can be finished with resume().
+        """
+        processed, skipped = 0, len(plan.skipped) + plan.filtered
+        try:
+            self._open_run(plan.destination_folder, plan.use_copy, plan.use_hardlinks, skip_duplicates, False,
+                           use_journal, log_callback, verify=plan.verify, claim_names=has_target_clashes(plan.items),
+                           source_folder=plan.source_folder)
+            if use_journal:
+                plan.save(os.path.join(plan.destination_folder, PLAN_FILENAME))
+            if skipped:
+                log_callback(f"Skipped by the plan: {skipped} file(s)\n")
+
+            items = plan.ordered_items()
+            total_files = len(items)
+            for i, (success, message) in enumerate(self._execute_items(items, plan.destination_folder, plan.use_copy)):
+                if success:
                     processed += 1
-                except PermissionError as e:
+                else:
                     skipped += 1
-                    log_callback(f"Permission error {'copying' if use_copy else 'moving'} {filename}: {e}\n")
-                except shutil.Error as e:
-                    skipped += 1
-                    log_callback(f"File operation error for {filename}: {e}\n")
-                except Exception as e:
+                log_callback(message)
+                progress_callback((i + 1) / total_files * 100)
+
+            if self.file_transfer.strategy_counts:
+                log_callback(f"Transfer strategies: {self.file_transfer.summary()}\n")
+
+        except Exception as e:
+            self._report_run_error("unexpected", f"An unexpected error occurred during organization: {e}\n", log_callback)
+        finally:
+            self._close_run(log_callback)
+            done_callback(processed, skipped)
+
+    def _execute_items(self, items, destination_folder, use_copy):
+        """
+        Transfers planned items in order. All target folders are created in one batch before the first transfer.
+        Yields (success, log_message) per item.
+        """
+        with self._phase("mkdir"):
+            folder_errors = self.destination_folders.ensure_all(os.path.dirname(item.target) for item in items)
+        if folder_errors:
+            self._count_error("mkdir", len(folder_errors))
+        for item in items:
+            target_subfolder_path = os.path.dirname(item.target)
+            if target_subfolder_path in folder_errors:
+                yield False, f"Error creating folder for {item.name}: {folder_errors[target_subfolder_path]}\n"
+                continue
+            subfolder_name = os.path.relpath(target_subfolder_path, destination_folder)
+            yield self._transfer_file(item, target_subfolder_path, subfolder_name, use_copy)
+
+    def resume(self, destination_folder, progress_callback, log_callback, done_callback):
+        """
+        Finishes an interrupted run into destination_folder, using its journal.
+        Transfers that were started but never completed are checked: truncated copies are removed and redone,
+        and moves that did finish are only marked as done. If the interrupted run was executing a plan,
+        its items that were never started are executed afterwards. Nothing else is rescanned.
+        """
+        processed, skipped = 0, 0
+        destination_folder = os.path.abspath(destination_folder) # Journaled paths are absolute
+        try:
+            pending, journaled_sources, _ = read_journal(destination_folder)
+            plan_path = os.path.join(destination_folder, PLAN_FILENAME)
+            plan = OrganizationPlan.load(plan_path) if os.path.exists(plan_path) else None
+            remaining_items = [item for item in plan.ordered_items() if item.path not in journaled_sources] if plan else []
+
+            total_files = len(pending) + len(remaining_items)
+            if total_files == 0:
+                log_callback("Nothing to resume in this destination folder.\n")
+            else:
+                log_callback(f"Resuming: {len(pending)} interrupted transfer(s), {len(remaining_items)} planned file(s) not started\n")
+
+            verify = plan.verify if plan else False
+            self._open_run(destination_folder, plan.use_copy if plan else False, plan.use_hardlinks if plan else False,
+                           False, False, True, log_callback, warn_unfinished=False, verify=verify,
+                           claim_names=has_target_clashes(remaining_items))
+            file_transfers = {True: FileTransfer(True, verify=verify), False: FileTransfer(False, verify=verify)}
+
+            def results():
+                for operation in pending:
+                    result = self._recover_operation(operation, file_transfers)
+                    self.journal.complete(operation.op_id, result[0])
+                    yield result
+                if remaining_items:
+                    yield from self._execute_items(remaining_items, destination_folder, plan.use_copy)
+
+            for i, (success, message) in enumerate(results()):
+                if success:
+                    processed += 1
+                else:
                     skipped += 1
-                    log_callback(f"Unexpected error {'copying' if use_copy else 'moving'} {filename}: {e}\n")
+                log_callback(message)
+                progress_callback((i + 1) / total_files * 100)
 
-                # Update progress for each file
-                progress_value = (i + 1) / total_files * 100
-                progress_callback(progress_value)
+            self.journal.earlier_work_resolved()
 
         except Exception as e:
-            # Catch any unexpected errors during the thread execution and report them
-            log_callback(f"An unexpected error occurred during organization: {e}\n")
+            self._report_run_error("unexpected", f"An unexpected error occurred while resuming: {e}\n", log_callback)
         finally:
-            done_callback(processed, skipped)
\ No newline at end of file
+            self._close_run(log_callback)
+            done_callback(processed, skipped)
+
+    def _recover_operation(self, operation, file_transfers):
+        """Brings one interrupted transfer to a finished state. Returns (success, log_message)."""
+        filename = os.path.basename(operation.dst)
+        try:
+            if not os.path.exists(operation.src):
+                if not operation.use_copy and os.path.isfile(operation.dst) and os.path.getsize(operation.dst) == operation.size:
+                    return True, f"Already moved: {filename}\n"
+                return False, f"Cannot resume {filename}: the source is gone and the destination is incomplete\n"
+
+            if os.path.exists(operation.dst):
+                if os.path.samefile(operation.src, operation.dst): # A hard link that was made before the interruption
+                    return True, f"Already linked: {filename}\n"
+                os.remove(operation.dst) # May be a truncated copy, redo it from scratch
+
+            os.makedirs(os.path.dirname(operation.dst), exist_ok=True)
+            strategy = file_transfers[operation.use_copy].transfer(operation.src, operation.dst)
+            return True, f"Resumed {'copy' if operation.use_copy else 'move'}: {filename} [{strategy}]\n"
+        except Exception as e:
+            return False, f"Could not resume {filename}: {e}\n"
+
+    def _open_run(self, destination_folder, use_copy, use_hardlinks, skip_duplicates, use_cache, use_journal, log_callback, warn_unfinished=True, verify=False, claim_names=False, source_folder=None):
+        """
+        Creates the destination folder and sets up the per-run helpers (transfers, journal, duplicate index, date cache).
+        claim_names: several files of the run may have the same name (see DestinationFolders).
+        source_folder: kept out of the duplicate index, in case it is inside the destination.
+        """
+        if self.metrics is not None:
+            self.metrics.start_run()
+        # Create destination folder if it doesn't exist
+        os.makedirs(destination_folder, exist_ok=True)
+        self.file_transfer = FileTransfer(use_copy, use_hardlinks, verify)
+        self.destination_folders = DestinationFolders(claim_names)
+
+        if warn_unfinished and has_unfinished_work(destination_folder):
+            log_callback("Warning: an interrupted run was found in the destination folder; resume it to finish its transfers.\n")
+        if use_journal:
+            self.journal = Journal(destination_folder)
+
+        if skip_duplicates:
+            log_callback("Indexing destination folder for duplicate detection...\n")
+            self.duplicate_index = DuplicateIndex(destination_folder, exclude_dirs=[source_folder] if source_folder else ())
+            indexed, added, removed = self.duplicate_index.refresh()
+            log_callback(f"Duplicate index: {indexed} file(s) ({added} new or changed, {removed} removed)\n")
+
+        if use_cache:
+            try:
+                self.metadata_cache = MetadataCache(destination_folder)
+            except Exception as e:
+                log_callback(f"Metadata cache unavailable, continuing without it: {e}\n")
+
+    def _close_run(self, log_callback):
+        """Saves and detaches the per-run helpers set up by _open_run."""
+        self._close_metadata_cache(log_callback)
+        self._close_duplicate_index(log_callback)
+        self._close_journal(log_callback)
+        self.destination_folders = None
+        if self.metrics is not None:
+            self.metrics.finish_run()
+
+    def _save_run(self, log_callback):
+        """Writes out what the duplicate index and date cache of the current run have buffered, without closing them."""
+        try:
+            if self.duplicate_index is not None:
+                self.duplicate_index.flush()
+            if self.metadata_cache is not None:
+                self.metadata_cache.flush()
+        except Exception as e:
+            log_callback(f"Could not save the run's indexes: {e}\n")
+
+    def _close_journal(self, log_callback):
+        """Syncs and detaches the journal of the current run, if any."""
+        journal, self.journal = self.journal, None
+        if journal is None:
+            return
+        try:
+            journal.close()
+        except Exception as e:
+            log_callback(f"Could not save the journal: {e}\n")
+
+    def _close_duplicate_index(self, log_callback):
+        """Saves and detaches the duplicate index of the current run, if any."""
+        index, self.duplicate_index = self.duplicate_index, None
+        if index is None:
+            return
+        try:
+            index.close()
+        except Exception as e:
+            log_callback(f"Could not save duplicate index: {e}\n")
+
+    def _close_metadata_cache(self, log_callback):
+        """Flushes and detaches the metadata cache of the current run, if any."""
+        cache, self.metadata_cache = self.metadata_cache, None
+        if cache is None:
+            return
+        try:
+            cache.close()
+            log_callback(f"Metadata cache: {cache.hits} hit(s), {cache.misses} miss(es)\n")
+        except Exception as e:
+            log_callback(f"Could not save metadata cache: {e}\n")
\ No newline at end of file
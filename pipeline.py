@@ -0,0 +1,121 @@
+# pipeline.py
+import queue
+import threading
+
+
+# Marks the end of the stream in a queue
+_END = object()
+
+# How often blocked workers wake up to check whether the pipeline was stopped
+_POLL_SECONDS = 0.1
+
+
+class _Failure:
+    """Carries an exception raised inside a stage to the consuming thread."""
+    __slots__ = ("error",)
+
+    def __init__(self, error):
+        self.error = error
+
+
+class Stage:
+    """
+    One step of a Pipeline.
+    function(item) returns (finished, value): finished values go straight to the pipeline output,
+    the others are handed to the next stage. Values returned by the last stage are always output.
+    """
+    __slots__ = ("name", "function", "workers")
+
+    def __init__(self, name, function, workers=1):
+        self.name = name
+        self.function = function
+        self.workers = max(1, workers)
+
+
+class Pipeline:
+    """
+    Runs items through a chain of stages, each with its own number of worker threads,
+    connected by bounded queues. A slow stage fills its input queue and then blocks the stages
+    before it (backpressure), so memory stays bounded however many items the source yields.
+    Iterating the pipeline yields the outputs in completion order; the source is read by its own thread.
+    """
+    def __init__(self, source, stages, queue_size=64):
+        self.source = source
+        self.stages = stages
+        self._queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+        self._output = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._threads = []
+
+    def __iter__(self):
+        self._start()
+        try:
+            while True:
+                value = self._output.get()
+                if value is _END:
+                    return
+                if isinstance(value, _Failure):
+                    raise value.error
+                yield value
+        finally:
+            self._stop.set()
+            for thread in self._threads:
+                thread.join()
+
+    def _start(self):
+        self._threads.append(threading.Thread(target=self._feed, daemon=True))
+        for index, stage in enumerate(self.stages):
+            remaining = [stage.workers] # Workers of this stage still running, shared between them
+            lock = threading.Lock()
+            for _ in range(stage.workers):
+                self._threads.append(threading.Thread(target=self._work, args=(index, remaining, lock), daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def _put(self, target_queue, value):
+        """Blocking put that gives up once the pipeline is stopped. Returns False in that case."""
+        while not self._stop.is_set():
+            try:
+                target_queue.put(value, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _feed(self):
+        try:
+            for item in self.source:
+                if not self._put(self._queues[0], item):
+                    return
+        except Exception as e:
+            self._put(self._output, _Failure(e))
+        self._put(self._queues[0], _END)
+
+    def _work(self, index, remaining, lock):
+        stage = self.stages[index]
+        in_queue = self._queues[index]
+        is_last = index == len(self.stages) - 1
+        next_queue = self._output if is_last else self._queues[index + 1]
+
+        while not self._stop.is_set():
+            try:
+                item = in_queue.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                continue
+            if item is _END:
+                in_queue.put(_END) # Let the other workers of this stage see it too
+                break
+            try:
+                finished, value = stage.function(item)
+            except Exception as e:
+                self._put(self._output, _Failure(e))
+                continue
+            if not self._put(self._output if (finished or is_last) else next_queue, value):
+                return
+
+        # The last worker of a stage to finish closes the next queue
+        with lock:
+            remaining[0] -= 1
+            last_worker = remaining[0] == 0
+        if last_worker:
+            self._put(next_queue, _END)
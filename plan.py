@@ -0,0 +1,135 @@
+# plan.py
+import json
+import os
+from collections import Counter
+
+
+PLAN_FORMAT_VERSION = 1
+
+
+class PlanItem:
+    """
+    One planned file operation. Mirrors the os.DirEntry interface (name, path, stat())
+    so the organizer can execute it exactly like a scanned file.
+    """
+    __slots__ = ("path", "target", "strategy", "size", "device")
+
+    def __init__(self, path, target, strategy, size, device):
+        self.path = path
+        self.target = target
+        self.strategy = strategy
+        self.size = size
+        self.device = device
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+    def stat(self):
+        return os.stat(self.path)
+
+    def to_list(self):
+        return [self.path, self.target, self.strategy, self.size, self.device]
+
+
+class OrganizationPlan:
+    """
+    The full list of operations an organization run would perform, computed up front by
+    PhotoOrganizer.plan() and applied by PhotoOrganizer.execute(). Can be saved to and loaded from JSON.
+    """
+    def __init__(self, source_folder, destination_folder, organization_mode, use_copy, use_hardlinks=False, verify=False):
+        self.source_folder = source_folder
+        self.destination_folder = destination_folder
+        self.organization_mode = organization_mode
+        self.use_copy = use_copy
+        self.use_hardlinks = use_hardlinks
+        self.verify = verify
+        self.items = []
+        self.skipped = [] # (source path, reason)
+        self.filtered = 0 # Files left out because of their type
+
+    def stats(self):
+        """Aggregate numbers describing the plan."""
+        strategy_counts = Counter()
+        strategy_bytes = Counter()
+        for item in self.items:
+            strategy_counts[item.strategy] += 1
+            strategy_bytes[item.strategy] += item.size
+        return {
+            "files": len(self.items),
+            "bytes": sum(strategy_bytes.values()),
+            "folders": len({os.path.dirname(item.target) for item in self.items}),
+            "skipped": len(self.skipped) + self.filtered,
+            "strategies": dict(strategy_counts),
+            "strategy_bytes": dict(strategy_bytes),
+        }
+
+    def summary(self):
+        """Human readable version of stats()."""
+        stats = self.stats()
+        lines = [
+            f"Files to {'copy' if self.use_copy else 'move'}: {stats['files']} ({format_size(stats['bytes'])})",
+            f"Destination folders: {stats['folders']}",
+            f"Skipped: {stats['skipped']}",
+        ]
+        for strategy, count in sorted(stats["strategies"].items()):
+            lines.append(f"  {strategy}: {count} file(s), {format_size(stats['strategy_bytes'][strategy])}")
+        return "\n".join(lines)
+
+    def ordered_items(self):
+        """Items grouped by source device and then by target folder, for disk locality during execution."""
+        return sorted(self.items, key=lambda item: (item.device, os.path.dirname(item.target), item.path))
+
+    def to_dict(self):
+        return {
+            "version": PLAN_FORMAT_VERSION,
+            "source_folder": self.source_folder,
+            "destination_folder": self.destination_folder,
+            "organization_mode": self.organization_mode,
+            "use_copy": self.use_copy,
+            "use_hardlinks": self.use_hardlinks,
+            "verify": self.verify,
+            "filtered": self.filtered,
+            "skipped": self.skipped,
+            "items": [item.to_list() for item in self.items],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("version") != PLAN_FORMAT_VERSION:
+            raise ValueError(f"Unsupported plan format version: {data.get('version')}")
+        plan = cls(data["source_folder"], data["destination_folder"], data["organization_mode"],
+                   data["use_copy"], data.get("use_hardlinks", False), data.get("verify", False))
+        plan.filtered = data.get("filtered", 0)
+        plan.skipped = [tuple(skipped) for skipped in data.get("skipped", [])]
+        plan.items = [PlanItem(*item) for item in data["items"]]
+        return plan
+
+    def save(self, file_path):
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, file_path):
+        with open(file_path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+def has_target_clashes(items):
+    """True if several planned items have the same target path (same-named files from different source folders)."""
+    targets = set()
+    for item in items:
+        if item.target in targets:
+            return True
+        targets.add(item.target)
+    return False
+
+
+def format_size(num_bytes):
+    """Formats a byte count as e.g. '1.5 GB'."""
+    size = float(num_bytes)
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}" if unit != "B" else f"{int(size)} B"
+        size /= 1024
+    return f"{size:.1f} TB"
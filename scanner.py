@@ -0,0 +1,70 @@
+# scanner.py
+import os
+
+
+class FileScanner:
+    """
+    Streams the files of a source folder using os.scandir.
+    Yields os.DirEntry objects, so file type and stat data gathered during the walk
+    can be reused by the organizer instead of being queried again.
+    Files whose extension is not selected are filtered out during the walk and only counted.
+    """
+    def __init__(self, root, extensions=None, max_depth=0, exclude_dirs=(), onerror=None):
+        """
+        max_depth: 0 scans only the root folder, N descends N levels of subfolders, None is unlimited.
+        exclude_dirs: folders that are never entered (e.g. a destination nested inside the source).
+        onerror: called with the OSError of a folder that could not be read; errors are ignored otherwise.
+        """
+        self.root = root
+        self.extensions = extensions
+        self.max_depth = max_depth
+        self.exclude_dirs = {os.path.normcase(os.path.abspath(d)) for d in exclude_dirs}
+        self.onerror = onerror
+        self.matched = 0 # Files yielded so far
+        self.filtered = 0 # Files skipped because of their extension
+
+    def __iter__(self):
+        return self._walk()
+
+    def count(self):
+        """
+        Cheap separate pass that returns the number of files the scan would yield.
+        Only reads directory entries, no file is opened.
+        """
+        total = 0
+        for _ in FileScanner(self.root, self.extensions, self.max_depth, self.exclude_dirs):
+            total += 1
+        return total
+
+    def _walk(self):
+        # Depth-first walk; a folder's subfolders are visited after the folder itself is fully read,
+        # so only one directory handle is open at a time.
+        pending_dirs = [(self.root, 0)]
+        while pending_dirs:
+            folder, depth = pending_dirs.pop()
+            try:
+                dir_iter = os.scandir(folder)
+            except OSError as e:
+                if self.onerror is not None:
+                    self.onerror(e)
+                continue
+
+            subfolders = []
+            with dir_iter:
+                for entry in dir_iter:
+                    try:
+                        if entry.is_file():
+                            if self.extensions is not None and os.path.splitext(entry.name)[1].lower() not in self.extensions:
+                                self.filtered += 1
+                                continue
+                            self.matched += 1
+                            yield entry
+                        elif (self.max_depth is None or depth < self.max_depth) and entry.is_dir(follow_symlinks=False):
+                            if os.path.normcase(os.path.abspath(entry.path)) not in self.exclude_dirs:
+                                subfolders.append(entry.path)
+                    except OSError as e:
+                        if self.onerror is not None:
+                            self.onerror(e)
+
+            # Reversed so subfolders are visited in directory order
+            pending_dirs.extend((path, depth + 1) for path in reversed(subfolders))
@@ -0,0 +1,305 @@
+# transfer.py
+import errno
+import mmap
+import os
+import shutil
+import threading
+import zlib
+from collections import Counter
+
+try:
+    import fcntl # Needed for reflinks (Linux only)
+except ImportError:
+    fcntl = None
+
+try:
+    import xxhash # Optional: verified copies use XXH3-128 when it is installed, CRC-32 otherwise
+except ImportError:
+    xxhash = None
+
+
+# Linux ioctl that makes the destination share the source's data blocks (Btrfs, XFS, ...)
+FICLONE = 0x40049409
+
+COPY_CHUNK_SIZE = 64 * 1024 * 1024
+# Verified copies stream through Python in chunks of this size (the checksums release the GIL on large updates)
+VERIFY_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Verification levels of FileTransfer (verify=True means VERIFY_CHECKSUM)
+VERIFY_SIZE = "size"
+VERIFY_CHECKSUM = "checksum"
+VERIFY_READBACK = "readback"
+VERIFY_MODES = (VERIFY_SIZE, VERIFY_CHECKSUM, VERIFY_READBACK)
+
+# Errors that mean "this fast path is not available here" rather than a real I/O failure
+UNSUPPORTED_ERRNOS = {
+    errno.EXDEV, errno.ENOSYS, errno.EOPNOTSUPP, errno.EINVAL, errno.ENOTTY, errno.EPERM, errno.EMLINK,
+    getattr(errno, "ENOTSUP", errno.EOPNOTSUPP),
+}
+
+
+class TransferVerificationError(OSError):
+    """Raised when a copy fails verification. The faulty copy is removed and the source kept."""
+
+
+class FileTransfer:
+    """
+    Picks the cheapest way to copy or move each file, based on whether source and destination
+    share a device (st_dev):
+      - move: os.replace on the same device, copy + delete (shutil.move) otherwise.
+      - copy: hard link (opt-in, same device), reflink (same device), os.copy_file_range,
+        then shutil.copy2, which itself uses sendfile/fcopyfile where the OS has them.
+    Strategies that fail as unsupported for a pair of devices are not tried again for that pair.
+    The strategy used for every file is counted in strategy_counts.
+
+    With verify, every copy that actually moves bytes (copies that aren't hard links or reflinks,
+    and moves across devices) is checked, and a move only deletes its source once its copy passed.
+    A failed check raises TransferVerificationError.
+      - VERIFY_SIZE: no checksum. The copy uses the fast paths above; afterwards the destination must have
+        the source's size and the source must not have changed (size, mtime) while it was copied.
+        Costs two stats per file.
+      - VERIFY_CHECKSUM (or True): a verified copy instead: the source is read once, its checksum computed while
+        the bytes are written, and the destination read back (from the page cache) and checksummed.
+        Catches bytes that were misread or lost on the way through the copy, close to copy speed.
+      - VERIFY_READBACK: like VERIFY_CHECKSUM, but the destination is synced and read back from the device.
+        Catches corruption on the way to the device too, at the price of an fsync and a second read of every file.
+    """
+    def __init__(self, use_copy, use_hardlinks=False, verify=False):
+        if verify is True:
+            verify = VERIFY_CHECKSUM
+        elif verify and verify not in VERIFY_MODES:
+            raise ValueError(f"Unknown verify mode: {verify}")
+        self.use_copy = use_copy
+        self.use_hardlinks = use_hardlinks
+        self.verify = verify or None
+        self._checksums = self.verify in (VERIFY_CHECKSUM, VERIFY_READBACK)
+        self.strategy_counts = Counter()
+        self._folder_devices = {}
+        self._unsupported = set() # (strategy, source device, destination device)
+        self._lock = threading.Lock()
+
+    def transfer(self, src, dst, src_stat=None):
+        """
+        Copies or moves src to dst (overwriting it, like shutil.copy2/shutil.move do).
+        Returns the name of the strategy that was used.
+        """
+        if src_stat is None:
+            src_stat = os.stat(src)
+        dst_device = self._device_of(os.path.dirname(dst))
+        devices = (src_stat.st_dev, dst_device)
+        same_device = src_stat.st_dev == dst_device
+
+        if self.use_copy:
+            strategy = self._copy(src, dst, src_stat, devices, same_device)
+        else:
+            strategy = self._move(src, dst, src_stat, same_device)
+
+        with self._lock:
+            self.strategy_counts[strategy] += 1
+        return strategy
+
+    def predict(self, src_stat, dst_folder):
+        """
+        Returns the strategy transfer() is expected to use, without touching any file.
+        Copies that are not hard links are reported as "copy": which fast path applies is only known once tried.
+        """
+        same_device = src_stat.st_dev == self._device_of(dst_folder)
+        if not self.use_copy:
+            if same_device:
+                return "rename"
+            return "verified-copy+delete" if self._checksums else "copy+delete"
+        if same_device and self.use_hardlinks:
+            return "hardlink"
+        return "verified-copy" if self._checksums else "copy"
+
+    def summary(self):
+        """One-line description of how many files used each strategy."""
+        return ", ".join(f"{name}: {count}" for name, count in self.strategy_counts.most_common())
+
+    def _device_of(self, folder):
+        """st_dev of a folder, or of its nearest existing parent if it does not exist yet."""
+        device = self._folder_devices.get(folder)
+        if device is None:
+            try:
+                device = os.stat(folder).st_dev
+            except FileNotFoundError:
+                parent = os.path.dirname(os.path.abspath(folder))
+                if parent == folder:
+                    raise
+                device = self._device_of(parent)
+            self._folder_devices[folder] = device
+        return device
+
+    def _move(self, src, dst, src_stat, same_device):
+        if same_device:
+            try:
+                os.replace(src, dst) # Unlike os.rename, also replaces an existing dst on Windows
+                return "rename"
+            except OSError:
+                pass # E.g. a file system that can't rename this file; shutil.move knows how to handle it
+        if self._checksums:
+            self._verified_copy(src, dst, src_stat)
+            os.unlink(src) # Only reached once the copy has been verified
+            return "verified-copy+delete"
+        if self.verify:
+            shutil.copy2(src, dst)
+            self._check_copy(src, dst, src_stat)
+            os.unlink(src) # Only reached once the copy has been checked
+            return "copy+delete"
+        shutil.move(src, dst)
+        return "copy+delete"
+
+    def _copy(self, src, dst, src_stat, devices, same_device):
+        candidates = []
+        if same_device:
+            if self.use_hardlinks:
+                candidates.append(("hardlink", self._hardlink))
+            if fcntl is not None:
+                candidates.append(("reflink", self._reflink))
+        if hasattr(os, "copy_file_range") and not self._checksums:
+            candidates.append(("copy_file_range", self._copy_file_range))
+
+        for strategy, copy_function in candidates:
+            if (strategy,) + devices in self._unsupported:
+                continue
+            try:
+                copy_function(src, dst, src_stat)
+                if self.verify and strategy == "copy_file_range":
+                    self._check_copy(src, dst, src_stat)
+                return strategy
+            except OSError as e:
+                if e.errno not in UNSUPPORTED_ERRNOS:
+                    raise
+                with self._lock:
+                    self._unsupported.add((strategy,) + devices)
+
+        # Only hard links and reflinks, which share the source's blocks, skip verification
+        if self._checksums:
+            self._verified_copy(src, dst, src_stat)
+            return "verified-copy"
+        shutil.copy2(src, dst)
+        if self.verify:
+            self._check_copy(src, dst, src_stat)
+        return "copy2"
+
+    def _hardlink(self, src, dst, src_stat):
+        try:
+            os.link(src, dst)
+        except FileExistsError:
+            os.unlink(dst) # Same overwrite behaviour as a regular copy
+            os.link(src, dst)
+
+    def _reflink(self, src, dst, src_stat):
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        shutil.copystat(src, dst)
+
+    def _copy_file_range(self, src, dst, src_stat):
+        copied = 0
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            while True:
+                count = os.copy_file_range(fsrc.fileno(), fdst.fileno(), COPY_CHUNK_SIZE)
+                if count == 0:
+                    break
+                copied += count
+        if copied != src_stat.st_size:
+            # Some file systems report success without copying anything
+            raise OSError(errno.EOPNOTSUPP, "copy_file_range copied an unexpected number of bytes", src)
+        shutil.copystat(src, dst)
+
+    def _verified_copy(self, src, dst, src_stat):
+        """
+        Single read pass over src that checksums while it writes, then a checksum of dst read back
+        (synced and read from the device with VERIFY_READBACK).
+        """
+        from_device = self.verify == VERIFY_READBACK
+        digest = _new_checksum()
+        buffer = bytearray(VERIFY_CHUNK_SIZE)
+        view = memoryview(buffer)
+        copied = 0
+        try:
+            with open(src, "rb", buffering=0) as fsrc, open(dst, "wb", buffering=0) as fdst:
+                while True:
+                    count = fsrc.readinto(buffer)
+                    if not count:
+                        break
+                    digest.update(view[:count])
+                    written = 0
+                    while written < count: # Unbuffered writes may be partial
+                        written += fdst.write(view[written:count])
+                    copied += count
+                if from_device:
+                    os.fsync(fdst.fileno()) # The read-back must see what is on the device, not what is in flight
+            if copied != src_stat.st_size:
+                raise TransferVerificationError(errno.EIO, f"read {copied} bytes, expected {src_stat.st_size}", src)
+            if _read_back_checksum(dst, buffer, from_device) != digest.digest():
+                raise TransferVerificationError(errno.EIO, "the copy does not match the source", dst)
+        except BaseException:
+            _remove_quietly(dst)
+            raise
+        shutil.copystat(src, dst)
+
+    def _check_copy(self, src, dst, src_stat):
+        """Quick verification: dst has the size of src, and src did not change while it was being copied."""
+        try:
+            dst_size = os.stat(dst).st_size
+            if dst_size != src_stat.st_size:
+                raise TransferVerificationError(errno.EIO, f"the copy has {dst_size} bytes, expected {src_stat.st_size}", dst)
+            current = os.stat(src)
+            if (current.st_size, current.st_mtime_ns) != (src_stat.st_size, src_stat.st_mtime_ns):
+                raise TransferVerificationError(errno.EIO, "the source changed while it was copied", src)
+        except BaseException:
+            _remove_quietly(dst)
+            raise
+
+
+class _Crc32:
+    """CRC-32 with the hashlib update/digest interface. Several GB/s, and plenty to catch I/O corruption."""
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def update(self, data):
+        self.value = zlib.crc32(data, self.value)
+
+    def digest(self):
+        return self.value.to_bytes(4, "big")
+
+
+def _remove_quietly(file_path):
+    try:
+        os.unlink(file_path)
+    except OSError:
+        pass
+
+
+def _new_checksum():
+    return xxhash.xxh3_128() if xxhash is not None else _Crc32()
+
+
+def _read_back_checksum(file_path, buffer, from_device):
+    """
+    Checksum of a file's content. With from_device, the file is dropped from the page cache first where possible,
+    so it is read from the device. Otherwise it is checksummed in place through a memory map where possible,
+    which saves copying the cached pages into buffer.
+    """
+    digest = _new_checksum()
+    view = memoryview(buffer)
+    with open(file_path, "rb", buffering=0) as f:
+        if from_device:
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+        elif os.fstat(f.fileno()).st_size:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    digest.update(mapped)
+                return digest.digest()
+            except (OSError, ValueError):
+                pass # No mmap on this file system: read it instead
+        while True:
+            count = f.readinto(buffer)
+            if not count:
+                break
+            digest.update(view[:count])
+    return digest.digest()
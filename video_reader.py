@@ -0,0 +1,219 @@
+# video_reader.py
+import struct
+from datetime import datetime, timedelta, timezone
+
+
+# Containers whose recording date can be read here
+MP4_EXTENSIONS = {".mp4", ".mov", ".m4v"}
+MATROSKA_EXTENSIONS = {".mkv", ".webm"}
+VIDEO_DATE_EXTENSIONS = MP4_EXTENSIONS | MATROSKA_EXTENSIONS
+
+# Epochs of the container timestamps
+MP4_EPOCH = datetime(1904, 1, 1, tzinfo=timezone.utc)
+MATROSKA_EPOCH = datetime(2001, 1, 1, tzinfo=timezone.utc)
+
+# Boxes an MP4/QuickTime file can start with
+MP4_FIRST_BOXES = {b"ftyp", b"moov", b"mdat", b"wide", b"free", b"skip", b"pnot", b"uuid"}
+
+# Bounds that keep a corrupt or hostile file from turning into a long walk
+MAX_TOP_LEVEL_BOXES = 64
+MAX_MOOV_CHILDREN = 256
+MAX_EBML_ELEMENTS = 256
+
+# Matroska element IDs (with their length marker bits, as they appear in the file)
+EBML_HEADER_ID = 0x1A45DFA3
+SEGMENT_ID = 0x18538067
+INFO_ID = 0x1549A966
+DATE_UTC_ID = 0x4461
+CLUSTER_ID = 0x1F43B675
+
+
+class VideoReadError(Exception):
+    """
+    Raised when a video container could not be parsed.
+    Callers should fall back to another date source (the file's modification time) in that case.
+    """
+
+
+def read_creation_datetime(file_path):
+    """
+    Reads the recording date of an MP4/MOV/M4V (moov/mvhd creation time) or Matroska/WebM (Info/DateUTC) file,
+    converted to local time like file modification times are.
+    Only box/element headers are read: large media data is skipped by seeking over it, so the cost is
+    a few small reads whatever the size of the file.
+    Returns None if the container is well formed but carries no date, and raises VideoReadError otherwise.
+    """
+    try:
+        with open(file_path, "rb") as f:
+            head = f.read(12)
+            if head[:4] == b"\x1a\x45\xdf\xa3":
+                f.seek(0)
+                created = _read_matroska_date(f)
+            elif head[4:8] in MP4_FIRST_BOXES:
+                f.seek(0)
+                created = _read_mp4_date(f)
+            else:
+                raise VideoReadError(f"Unsupported video header: {file_path}")
+        if created is None:
+            return None
+        return created.astimezone().replace(tzinfo=None)
+    except (OSError, IndexError, struct.error, OverflowError, ValueError) as e:
+        raise VideoReadError(f"Could not read video header of {file_path}: {e}") from e
+
+
+def _is_box_type(box_type):
+    return all(32 <= byte < 127 for byte in box_type)
+
+
+def _read_exact(f, size):
+    """Reads exactly size bytes, raising VideoReadError if the file is cut short."""
+    data = f.read(size)
+    if len(data) < size:
+        raise VideoReadError(f"Truncated header at offset {f.tell()}")
+    return data
+
+
+def _read_box_header(f, end=None):
+    """
+    Reads an MP4 box header at the current position.
+    Returns (type, start of the payload, end of the box), with the end None if the box runs to the end of the file,
+    or None at the end of the file (or of the parent box, if end is given).
+    """
+    start = f.tell()
+    if end is not None and start + 8 > end:
+        return None
+    header = f.read(8)
+    if len(header) < 8:
+        return None
+    size, box_type = struct.unpack(">I4s", header)
+    if not _is_box_type(box_type):
+        raise VideoReadError(f"Invalid box type at offset {start}")
+    payload_start = start + 8
+    if size == 1: # 64-bit size follows the type
+        size = struct.unpack(">Q", _read_exact(f, 8))[0]
+        payload_start += 8
+    elif size == 0: # Box extends to the end of the file (or of its parent)
+        return box_type, payload_start, end
+    if size < payload_start - start:
+        raise VideoReadError(f"Invalid size of box {box_type!r} at offset {start}")
+    return box_type, payload_start, start + size
+
+
+def _read_mp4_date(f):
+    """Finds moov/mvhd among the top-level boxes, seeking over the others (mdat included)."""
+    for _ in range(MAX_TOP_LEVEL_BOXES):
+        box = _read_box_header(f)
+        if box is None:
+            return None
+        box_type, payload_start, box_end = box
+        if box_type == b"moov":
+            return _read_mvhd_date(f, payload_start, box_end)
+        if box_end is None: # Last box of the file and not moov: there is no moov
+            return None
+        f.seek(box_end)
+    raise VideoReadError("Too many top-level boxes before moov")
+
+
+def _read_mvhd_date(f, moov_start, moov_end):
+    f.seek(moov_start)
+    for _ in range(MAX_MOOV_CHILDREN):
+        box = _read_box_header(f, moov_end)
+        if box is None:
+            return None
+        box_type, payload_start, box_end = box
+        if box_type == b"mvhd":
+            version = _read_exact(f, 4)[0] # Version byte, then 24 bits of flags
+            if version == 1:
+                seconds = struct.unpack(">Q", _read_exact(f, 8))[0]
+            else:
+                seconds = struct.unpack(">I", _read_exact(f, 4))[0]
+            if seconds == 0: # Unset, written by some encoders
+                return None
+            return MP4_EPOCH + timedelta(seconds=seconds)
+        if box_end is None:
+            return None
+        f.seek(box_end)
+    raise VideoReadError("Too many boxes inside moov")
+
+
+def _read_vint(f, keep_marker):
+    """
+    Reads an EBML variable length integer. Element IDs keep their length marker bits, sizes don't.
+    Returns (value, all_ones), where all_ones flags the reserved 'unknown size' value.
+    """
+    first = f.read(1)
+    if not first:
+        return None, False
+    first = first[0]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        length += 1
+        mask >>= 1
+    if length > 8:
+        raise VideoReadError("Invalid EBML variable length integer")
+    value = first if keep_marker else first & (mask - 1)
+    all_ones = (first & (mask - 1)) == mask - 1
+    rest = f.read(length - 1)
+    if len(rest) < length - 1:
+        return None, False
+    for byte in rest:
+        value = (value << 8) | byte
+        all_ones = all_ones and byte == 0xFF
+    return value, all_ones
+
+
+def _read_ebml_element(f, end=None):
+    """Returns (id, payload start, payload end) of the element at the current position, payload end None if unknown."""
+    if end is not None and f.tell() >= end:
+        return None
+    element_id, _ = _read_vint(f, keep_marker=True)
+    if element_id is None:
+        return None
+    size, unknown_size = _read_vint(f, keep_marker=False)
+    if size is None:
+        return None
+    payload_start = f.tell()
+    return element_id, payload_start, None if unknown_size else payload_start + size
+
+
+def _read_matroska_date(f):
+    """Walks EBML header -> Segment -> Info -> DateUTC, seeking over every other element (clusters included)."""
+    header = _read_ebml_element(f)
+    if header is None or header[0] != EBML_HEADER_ID or header[2] is None:
+        raise VideoReadError("Missing EBML header")
+    f.seek(header[2])
+
+    segment = _read_ebml_element(f)
+    if segment is None or segment[0] != SEGMENT_ID:
+        raise VideoReadError("Missing Matroska segment")
+    segment_end = segment[2]
+
+    for _ in range(MAX_EBML_ELEMENTS):
+        element = _read_ebml_element(f, segment_end)
+        if element is None:
+            return None
+        element_id, payload_start, payload_end = element
+        if element_id == INFO_ID:
+            return _read_date_utc(f, payload_end)
+        if payload_end is None or element_id == CLUSTER_ID:
+            return None # Media data reached (Info always comes before it in practice) or size unknown
+        f.seek(payload_end)
+    raise VideoReadError("Too many elements before Info")
+
+
+def _read_date_utc(f, info_end):
+    for _ in range(MAX_EBML_ELEMENTS):
+        element = _read_ebml_element(f, info_end)
+        if element is None:
+            return None
+        element_id, payload_start, payload_end = element
+        if payload_end is None:
+            raise VideoReadError("Unknown size inside Info")
+        if element_id == DATE_UTC_ID:
+            if payload_end - payload_start != 8:
+                raise VideoReadError("Invalid DateUTC size")
+            nanoseconds = struct.unpack(">q", _read_exact(f, 8))[0]
+            return MATROSKA_EPOCH + timedelta(microseconds=nanoseconds // 1000)
+        f.seek(payload_end)
+    raise VideoReadError("Too many elements inside Info")
@@ -0,0 +1,322 @@
+# watcher.py
+import errno
+import os
+import select
+import stat
+import struct
+import time
+
+from scanner import FileScanner
+
+try:
+    import ctypes
+    _libc = ctypes.CDLL(None, use_errno=True)
+    _inotify_init1 = _libc.inotify_init1
+    _inotify_add_watch = _libc.inotify_add_watch
+    _inotify_add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+    _inotify_rm_watch = _libc.inotify_rm_watch
+    _inotify_rm_watch.argtypes = (ctypes.c_int, ctypes.c_int)
+except (ImportError, OSError, TypeError, AttributeError): # No inotify (not Linux), fall back to periodic scans
+    _inotify_init1 = None
+
+
+# A file is organized once its (inode, size, mtime) has not changed for this long
+DEFAULT_SETTLE_SECONDS = 2.0
+# Time between two scans of the source when inotify is not available
+DEFAULT_POLL_INTERVAL = 5.0
+# Longest time a watcher blocked on inotify goes without checking whether it was asked to stop
+STOP_CHECK_INTERVAL = 1.0
+
+# inotify constants (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+# struct inotify_event: int wd; uint32_t mask, cookie, len; char name[len]
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _signature(stat_result):
+    return stat_result.st_ino, stat_result.st_size, stat_result.st_mtime_ns
+
+
+class WatchedFile:
+    """
+    A file that arrived in a watched folder and stopped changing.
+    Mirrors the os.DirEntry interface (name, path, stat()) so the organizer can process it like a scanned file;
+    stat() returns the stat taken when the file was found to be stable.
+    """
+    __slots__ = ("path", "name", "_stat")
+
+    def __init__(self, path, stat_result):
+        self.path = path
+        self.name = os.path.basename(path)
+        self._stat = stat_result
+
+    def stat(self):
+        return self._stat
+
+
+class FolderWatcher:
+    """
+    Watches a source folder for new and changed files and reports each one once it has stopped changing.
+    Keeps a snapshot of the files it has already reported, as (inode, size, mtime), so a file is only
+    reported again if it changes.
+    Changes are detected with inotify where available (Linux), which costs nothing while the folder is idle.
+    Elsewhere, or once the inotify watch limit is reached, the folder is scanned with scandir every
+    poll_interval seconds and compared with the snapshot.
+    A file counts as stable once its (inode, size, mtime) has not changed for settle_seconds,
+    so files that are still being uploaded or copied in are left alone.
+    """
+    def __init__(self, root, stop_event, extensions=None, max_depth=0, exclude_dirs=(),
+                 settle_seconds=DEFAULT_SETTLE_SECONDS, poll_interval=DEFAULT_POLL_INTERVAL, use_inotify=True, onerror=None):
+        """
+        stop_event: threading.Event that ends batches() once set.
+        extensions, max_depth, exclude_dirs: as for FileScanner.
+        onerror: called with the OSError of a folder that could not be read or watched.
+        """
+        self.root = root
+        self.stop_event = stop_event
+        self.extensions = extensions
+        self.max_depth = max_depth
+        self.exclude_dirs = {os.path.normcase(os.path.abspath(d)) for d in exclude_dirs}
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.onerror = onerror
+        self.backend = "polling"
+        self._known = {} # path -> signature of files already reported
+        self._candidates = {} # path -> (signature, monotonic time it was last seen changing)
+        self._watches = {} # inotify watch descriptor -> (folder, depth)
+        self._inotify_fd = None
+        self._next_scan = 0.0
+        if use_inotify and _inotify_init1 is not None:
+            self._start_inotify()
+
+    def batches(self, batch_size):
+        """
+        Yields lists of at most batch_size WatchedFile until stop_event is set.
+        Files already in the folder when watching starts are reported too.
+        """
+        if self.backend == "inotify":
+            self._scan(self.root, 0) # Watches are in place, so nothing that arrives from now on is missed
+        while not self.stop_event.is_set():
+            self._wait_for_changes()
+            ready = self._settled_files()
+            for i in range(0, len(ready), batch_size):
+                yield ready[i:i + batch_size]
+
+    def close(self):
+        if self._inotify_fd is not None:
+            os.close(self._inotify_fd)
+            self._inotify_fd = None
+        self._watches.clear()
+
+    def _wait_for_changes(self):
+        """Blocks until something may have changed or the next candidate is due for a stability check."""
+        now = time.monotonic()
+        deadline = min((changed_at + self.settle_seconds for _, changed_at in self._candidates.values()), default=None)
+        if self.backend == "inotify":
+            timeout = STOP_CHECK_INTERVAL if deadline is None else min(max(deadline - now, 0), STOP_CHECK_INTERVAL)
+            if select.select([self._inotify_fd], [], [], timeout)[0]:
+                self._read_events()
+            return
+
+        deadline = self._next_scan if deadline is None else min(deadline, self._next_scan)
+        if deadline > now:
+            self.stop_event.wait(deadline - now)
+        if time.monotonic() >= self._next_scan and not self.stop_event.is_set():
+            self._scan(self.root, 0, forget_missing=True)
+            self._next_scan = time.monotonic() + self.poll_interval
+
+    def _settled_files(self):
+        """Re-checks the candidates that have not changed for settle_seconds. Returns the stable ones."""
+        now = time.monotonic()
+        ready = []
+        for path, (signature, changed_at) in list(self._candidates.items()):
+            if now - changed_at < self.settle_seconds:
+                continue
+            try:
+                stat_result = os.stat(path)
+            except OSError: # Gone (moved away or deleted) before it settled
+                del self._candidates[path]
+                continue
+            current = _signature(stat_result)
+            if current != signature:
+                self._candidates[path] = (current, now)
+                continue
+            del self._candidates[path]
+            self._known[path] = current
+            ready.append(WatchedFile(path, stat_result))
+        return ready
+
+    def _notice(self, path, stat_result=None):
+        """Records that path may be new or changed."""
+        if stat_result is None:
+            try:
+                stat_result = os.stat(path)
+            except OSError:
+                self._forget(path)
+                return
+            if not stat.S_ISREG(stat_result.st_mode):
+                return
+        signature = _signature(stat_result)
+        if self._known.get(path) == signature:
+            return
+        candidate = self._candidates.get(path)
+        if candidate is None or candidate[0] != signature:
+            self._candidates[path] = (signature, time.monotonic())
+
+    def _forget(self, path):
+        self._known.pop(path, None)
+        self._candidates.pop(path, None)
+
+    def _scan(self, folder, depth, forget_missing=False):
+        """Compares the files under folder with the snapshot. With forget_missing, files no longer there are dropped from it."""
+        seen = set() if forget_missing else None
+        max_depth = None if self.max_depth is None else self.max_depth - depth
+        for entry in FileScanner(folder, self.extensions, max_depth, self.exclude_dirs, self.onerror):
+            try:
+                stat_result = entry.stat()
+            except OSError:
+                continue
+            self._notice(entry.path, stat_result)
+            if seen is not None:
+                seen.add(entry.path)
+        if seen is not None:
+            for path in [path for path in self._known if path not in seen]:
+                del self._known[path]
+
+    def _is_selected(self, name):
+        return self.extensions is None or os.path.splitext(name)[1].lower() in self.extensions
+
+    def _descends_into(self, folder, depth):
+        return ((self.max_depth is None or depth <= self.max_depth)
+                and os.path.normcase(os.path.abspath(folder)) not in self.exclude_dirs)
+
+    # inotify backend
+
+    def _start_inotify(self):
+        fd = _inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return
+        self._inotify_fd = fd
+        self.backend = "inotify"
+        try:
+            self._watch_tree(self.root, 0)
+        except OSError as e:
+            self._fall_back_to_polling(e)
+
+    def _watch_tree(self, folder, depth):
+        """
+        Adds a watch on folder and its subfolders (down to max_depth). Folders that can't be read are reported
+        to onerror and skipped; running out of watches (or kernel memory) raises OSError.
+        """
+        pending_dirs = [(folder, depth)]
+        while pending_dirs:
+            folder, depth = pending_dirs.pop()
+            wd = _inotify_add_watch(self._inotify_fd, os.fsencode(folder), _WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                e = OSError(err, os.strerror(err), folder)
+                if err in (errno.ENOSPC, errno.ENOMEM):
+                    raise e
+                if self.onerror is not None:
+                    self.onerror(e)
+                continue
+            self._watches[wd] = (folder, depth)
+            if self.max_depth is not None and depth >= self.max_depth:
+                continue
+            try:
+                with os.scandir(folder) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False) and self._descends_into(entry.path, depth + 1):
+                            pending_dirs.append((entry.path, depth + 1))
+            except OSError as e:
+                if self.onerror is not None:
+                    self.onerror(e)
+
+    def _read_events(self):
+        touched = set() # Files with events in this read, stat'ed once each however many writes they got
+        new_dirs = []
+        overflow = False
+        while True:
+            try:
+                data = os.read(self._inotify_fd, 65536)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                else:
+                    self._handle_event(wd, mask, name, touched, new_dirs)
+
+        try:
+            for folder, depth in new_dirs:
+                self._watch_tree(folder, depth)
+        except OSError as e:
+            self._fall_back_to_polling(e)
+            return
+        if overflow: # Events were lost, so the snapshot can't be trusted: compare it with the folder again
+            self._scan(self.root, 0, forget_missing=True)
+            return
+        for folder, depth in new_dirs: # Files may have landed in a new folder before it was watched
+            self._scan(folder, depth)
+        for path in touched:
+            self._notice(path)
+
+    def _handle_event(self, wd, mask, name, touched, new_dirs):
+        watch = self._watches.get(wd)
+        if watch is None:
+            return
+        if mask & IN_IGNORED: # The folder was deleted or is no longer watched
+            del self._watches[wd]
+            return
+        folder, depth = watch
+        if not name:
+            return
+        path = os.path.join(folder, name)
+        if mask & IN_ISDIR:
+            if mask & (IN_CREATE | IN_MOVED_TO) and self._descends_into(path, depth + 1):
+                new_dirs.append((path, depth + 1))
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self._forget_folder(path)
+            return
+        if not self._is_selected(name):
+            return
+        if mask & (IN_DELETE | IN_MOVED_FROM):
+            touched.discard(path)
+            self._forget(path)
+        else:
+            touched.add(path)
+
+    def _forget_folder(self, folder):
+        """Drops the watches and snapshot entries of a folder that was deleted or moved away."""
+        prefix = os.path.join(folder, "")
+        for wd, (watched_folder, _) in list(self._watches.items()):
+            if watched_folder == folder or watched_folder.startswith(prefix):
+                _inotify_rm_watch(self._inotify_fd, wd) # A moved folder keeps its watch, now under an unknown path
+                del self._watches[wd]
+        for snapshot in (self._known, self._candidates):
+            for path in [path for path in snapshot if path.startswith(prefix)]:
+                del snapshot[path]
+
+    def _fall_back_to_polling(self, error):
+        self.close()
+        self.backend = "polling"
+        self._next_scan = 0.0
+        if self.onerror is not None:
+            self.onerror(OSError(error.errno, f"{error.strerror}; watching with periodic scans instead", error.filename))